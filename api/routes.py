@@ -352,8 +352,8 @@ async def voice_agent_websocket(
             audio_service = UnifiedAudioService()
             
             # Create voice services (simplified - in production these should be properly managed)
-            from config.settings import Settings
-            settings = Settings()
+            from config.settings import get_settings
+            settings = get_settings()
             voice_sk_service = VoiceSemanticKernelService(settings)
             await voice_sk_service.initialize()
             voice_unified_service = VoiceUnifiedAgentService(voice_sk_service)
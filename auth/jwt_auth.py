@@ -5,9 +5,9 @@ Based on the core Backend JWT implementation but simplified for AI service needs
 
 from typing import Optional
 from jose import JWTError, jwt
-from config.settings import Settings
+from config.settings import get_settings
 
-settings = Settings()
+settings = get_settings()
 
 def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
     """
@@ -4,6 +4,7 @@ Application settings and configuration
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
+from functools import lru_cache
 from typing import List
 import os
 load_dotenv()
@@ -13,6 +14,8 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "your_openai_api_key_here")
     openai_model: str = "gpt-4-turbo-preview"
+    # Enforce response JSON schemas (requires a model with structured outputs, e.g. gpt-4o)
+    openai_structured_outputs: bool = False
     
     # Application Configuration
     app_host: str = "0.0.0.0"
@@ -23,9 +26,16 @@ class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL", "")
     database_name: str = os.getenv("DATABASE_NAME", "")
     
+    # Redis Configuration (optional, shares health check results between replicas)
+    redis_url: str = os.getenv("REDIS_URL", "")
+    
     # Semantic Kernel Configuration
     sk_log_level: str = "INFO"
     
+    # Voice agent conversations kept in memory
+    max_sessions: int = 10000
+    session_ttl_seconds: int = 3600
+    
     # Business Configuration
     default_vat_rate: float = 20.0
     default_currency: str = "EUR"
@@ -53,4 +63,16 @@ class Settings(BaseSettings):
     
     def validate_openai_key(self) -> bool:
         """Validate that OpenAI API key is set"""
-        return bool(self.openai_api_key and self.openai_api_key != "your_openai_api_key_here")
\ No newline at end of file
+        return bool(self.openai_api_key and self.openai_api_key != "your_openai_api_key_here")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the process-wide settings instance
+    
+    Environment variables and the .env file are parsed once on first use
+    
+    Returns:
+        Shared Settings instance
+    """
+    return Settings()
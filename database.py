@@ -1,13 +1,13 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
-from config.settings import Settings
+from config.settings import get_settings
 import asyncio
 import logging
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-settings = Settings()
+settings = get_settings()
 
 class Database:
     client: AsyncIOMotorClient = None
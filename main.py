@@ -15,10 +15,10 @@ from datetime import datetime
 
 # Setup logging configuration with Windows compatibility
 import sys
-from config.settings import Settings
+from config.settings import get_settings
 
 # Load settings early for logging configuration
-settings = Settings()
+settings = get_settings()
 
 # Create console handler with UTF-8 encoding for Windows
 console_handler = logging.StreamHandler(sys.stdout)
@@ -50,6 +50,7 @@ logger = logging.getLogger(__name__)
 from api.routes import agent_router
 from services.semantic_kernel_service import SemanticKernelService
 from voice_services.semantic_kernel_service import SemanticKernelService as VoiceSemanticKernelService
+from voice_services.http_client import close_shared_http_client
 from database import connect_to_mongo, close_mongo_connection, is_connected, get_database
 
 # Load environment variables
@@ -83,6 +84,21 @@ async def lifespan(app: FastAPI):
         voice_sk_service = VoiceSemanticKernelService(settings)
         await voice_sk_service.initialize()
         
+        # Load the voice agents' tools concurrently now instead of on their first request
+        try:
+            await voice_sk_service.preload_tools()
+            logger.info("[STARTUP] Voice agent tools preloaded")
+        except Exception as e:
+            logger.warning(f"[STARTUP] Voice agent tool preload incomplete, remaining tools load on first use: {str(e)}")
+        
+        # Warm up the shared OpenAI connection pool (also used for transcription) with
+        # the free models endpoint so the first voice request is not cold
+        try:
+            warmed_up = await voice_sk_service.test_openai_connection()
+            logger.info(f"[STARTUP] OpenAI connection warm-up {'completed' if warmed_up else 'failed'}")
+        except Exception as e:
+            logger.warning(f"[STARTUP] OpenAI connection warm-up skipped: {str(e)}")
+        
         # Store in app state for access in routes
         app.state.sk_service = sk_service
         app.state.voice_sk_service = voice_sk_service
@@ -106,7 +122,10 @@ async def lifespan(app: FastAPI):
         
         if voice_sk_service:
             logger.info("🎤 Cleaning up Voice AI services...")
-            await voice_sk_service.cleanup()
+            await voice_sk_service.shutdown()
+        
+        # Close the pooled HTTP client shared by the voice and audio services
+        await close_shared_http_client()
         
         # Close database connection
         logger.info("📊 Closing database connection...")
@@ -250,7 +269,7 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     # Run the application
-    settings = Settings()
+    settings = get_settings()
     uvicorn.run(
         "main:app",
         host=settings.app_host,
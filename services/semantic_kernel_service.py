@@ -11,8 +11,10 @@ from semantic_kernel.functions import kernel_function
 from semantic_kernel.functions.kernel_function_decorator import kernel_function
 import asyncio
 import logging
+import time
 from typing import Optional, Dict, Any, List
 import json
+import orjson
 from datetime import datetime, timedelta
 
 from config.settings import Settings
@@ -29,6 +31,9 @@ class SemanticKernelService:
     and orchestrates all AI agents and tools for business automation
     """
     
+    # How long a successful OpenAI connection test is reused
+    CONNECTION_TEST_TTL_SECONDS = 30
+    
     def __init__(self, settings: Settings):
         """Initialize the Semantic Kernel service"""
         self.settings = settings
@@ -44,6 +49,16 @@ class SemanticKernelService:
         self.expense_tools: Optional[ExpenseTools] = None
         self.manual_task_tools: Optional[ManualTaskTools] = None
         
+        # Connection test request, built once and reused by every health check
+        self._test_history = ChatHistory()
+        self._test_history.add_user_message("Test connection - respond with 'OK'")
+        self._test_settings = OpenAIChatPromptExecutionSettings(
+            ai_model_id=settings.openai_model,
+            max_tokens=10,
+            temperature=0.1
+        )
+        self._last_successful_test: Optional[float] = None
+        
         # Configure logging
         logging.basicConfig(level=getattr(logging, settings.sk_log_level))
         self.logger = logging.getLogger(__name__)
@@ -105,30 +120,6 @@ class SemanticKernelService:
             if hasattr(tool, 'initialize'):
                 await tool.initialize()
     
-    def is_initialized(self) -> bool:
-        """Check if the service is properly initialized"""
-        return self._initialized and self.kernel is not None
-    
-    async def test_openai_connection(self) -> bool:
-        """Test the OpenAI connection"""
-        try:
-            if not self.chat_service:
-                return False
-            
-            # Simple test prompt
-            test_prompt = "Reply with just the word 'OK' if you can read this."
-            result = await self.chat_service.get_chat_message_content(
-                chat_history=[],
-                settings=sk.PromptExecutionSettings(),
-                prompt=test_prompt
-            )
-            
-            return "OK" in str(result).upper()
-            
-        except Exception as e:
-            self.logger.error(f"OpenAI connection test failed: {e}")
-            return False
-    
     async def process_invoice_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: list = None) -> Dict[str, Any]:
         """
         Process invoice generation request using AI agent
@@ -376,13 +367,13 @@ class SemanticKernelService:
         """
         import re
         
-        if not response_text or not response_text.strip():
+        if not response_text or response_text.isspace():
             return {"error": "Empty response from AI", "raw_response": response_text}
         
         # Try 1: Direct JSON parse (best case scenario)
         try:
-            return json.loads(response_text.strip())
-        except json.JSONDecodeError:
+            return orjson.loads(response_text.strip())
+        except orjson.JSONDecodeError:
             pass
         
         # Try 2: Extract JSON from markdown code blocks (```json ... ``` or ``` ... ```)
@@ -396,8 +387,8 @@ class SemanticKernelService:
             if match:
                 json_str = match.group(1).strip()
                 try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
+                    return orjson.loads(json_str)
+                except orjson.JSONDecodeError:
                     continue
         
         # Try 3: Find JSON object by locating first '{' and last '}'
@@ -407,8 +398,8 @@ class SemanticKernelService:
         if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
             json_str = response_text[start_idx:end_idx + 1]
             try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
+                return orjson.loads(json_str)
+            except orjson.JSONDecodeError:
                 pass
         
         # Try 4: Find JSON array by locating first '[' and last ']'
@@ -418,9 +409,9 @@ class SemanticKernelService:
         if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
             json_str = response_text[start_idx:end_idx + 1]
             try:
-                parsed = json.loads(json_str)
+                parsed = orjson.loads(json_str)
                 return {"items": parsed} if isinstance(parsed, list) else parsed
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 pass
         
         # Try 5: Handle common LLM response patterns
@@ -441,8 +432,8 @@ class SemanticKernelService:
         if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
             json_str = cleaned[start_idx:end_idx + 1]
             try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
+                return orjson.loads(json_str)
+            except orjson.JSONDecodeError:
                 pass
         
         # Final fallback: Return the raw response with error indication
@@ -509,7 +500,7 @@ class SemanticKernelService:
         
         context_info = ""
         if context:
-            context_info = f"\\nContext: {json.dumps(context, indent=2)}"
+            context_info = f"\\nContext: {json.dumps(context, separators=(',', ':'), ensure_ascii=False)}"
         
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
@@ -1415,24 +1406,23 @@ ALWAYS return valid JSON with a manual task structure."""
             if not self.chat_service:
                 return False
             
-            # Simple test prompt
-            test_prompt = "Test connection - respond with 'OK'"
-            
-            # Create chat history
-            history = ChatHistory()
-            history.add_user_message(test_prompt)
+            # Reuse a recent successful result so frequent health checks don't hit the API
+            now = time.monotonic()
+            if (
+                self._last_successful_test is not None
+                and now - self._last_successful_test < self.CONNECTION_TEST_TTL_SECONDS
+            ):
+                return True
             
             # Get response
             response = await self.chat_service.get_chat_message_content(
-                chat_history=history,
-                settings=OpenAIChatPromptExecutionSettings(
-                    ai_model_id=self.settings.openai_model,
-                    max_tokens=10,
-                    temperature=0.1
-                )
+                chat_history=self._test_history,
+                settings=self._test_settings
             )
             
-            return response and len(str(response).strip()) > 0
+            success = bool(response and len(str(response).strip()) > 0)
+            self._last_successful_test = now if success else None
+            return success
             
         except Exception as e:
             self.logger.error(f"OpenAI connection test failed: {e}")
@@ -1443,11 +1433,15 @@ ALWAYS return valid JSON with a manual task structure."""
         try:
             self.logger.info("Cleaning up Semantic Kernel service...")
             
-            # Cleanup tools if they have cleanup methods
-            for tool in [self.invoice_tools, self.customer_tools, self.quote_tools, 
-                        self.job_tools, self.expense_tools]:
-                if tool and hasattr(tool, 'cleanup'):
-                    await tool.cleanup()
+            # Cleanup tools that have cleanup methods concurrently
+            tools = [tool for tool in (self.invoice_tools, self.customer_tools, self.quote_tools,
+                                       self.job_tools, self.expense_tools)
+                     if tool and hasattr(tool, 'cleanup')]
+            results = await asyncio.gather(*(tool.cleanup() for tool in tools), return_exceptions=True)
+            
+            for tool, result in zip(tools, results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Failed to clean up {type(tool).__name__}: {result}")
             
             self._initialized = False
             self.logger.info("Semantic Kernel service cleaned up successfully")
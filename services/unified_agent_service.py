@@ -59,8 +59,8 @@ class UnifiedAgentService:
         
         # Initialize settings
         if settings is None:
-            from config.settings import Settings
-            settings = Settings()
+            from config.settings import get_settings
+            settings = get_settings()
         self.settings = settings
         
         # Initialize tools
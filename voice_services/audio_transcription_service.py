@@ -5,12 +5,63 @@ Integrated directly into Devia backend for voice processing
 """
 
 import os
+import io
+import shutil
+import asyncio
 import logging
-import tempfile
-from pathlib import Path
-from typing import Optional, Dict, Any
-from openai import OpenAI, OpenAIError
-from config.settings import Settings
+import threading
+from typing import Optional, Dict, Any, Union, ClassVar, FrozenSet
+from openai import AsyncOpenAI, OpenAIError
+from config.settings import get_settings
+from .http_client import get_shared_http_client
+
+# Optional local voice activity detection (silero-vad + PyAV)
+try:
+    import av
+    import numpy as np
+    from silero_vad import load_silero_vad, get_speech_timestamps
+    vad_available = True
+except ImportError:
+    vad_available = False
+
+# ffmpeg is used to transcode large uploads before sending them to Whisper
+ffmpeg_available = shutil.which("ffmpeg") is not None
+
+logger = logging.getLogger(__name__)
+
+# Local VAD model, loaded on first use and shared by every service instance.
+# The model keeps state while it scans the audio, so inference holds the lock too
+_vad_model = None
+_vad_load_failed = False
+_vad_lock = threading.Lock()
+
+
+def _speech_timestamps(audio: "np.ndarray", threshold: float, sampling_rate: int) -> Optional[list]:
+    """
+    Run the shared VAD model over mono audio, loading it on first use
+    
+    Args:
+        audio: Mono float samples
+        threshold: Speech probability threshold
+        sampling_rate: Sample rate of the audio
+    
+    Returns:
+        Speech timestamps, or None if the model could not be loaded
+    """
+    global _vad_model, _vad_load_failed
+    
+    with _vad_lock:
+        if _vad_model is None:
+            if _vad_load_failed:
+                return None
+            try:
+                _vad_model = load_silero_vad(onnx=True)
+            except Exception as e:
+                _vad_load_failed = True
+                logger.warning(f"Could not load VAD model, speech pre-filter disabled: {e}")
+                return None
+        
+        return get_speech_timestamps(audio, _vad_model, threshold=threshold, sampling_rate=sampling_rate)
 
 class AudioTranscriptionService:
     """
@@ -19,9 +70,21 @@ class AudioTranscriptionService:
     """
     
     # Supported audio formats for OpenAI Whisper
-    SUPPORTED_FORMATS = ['.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm']
+    SUPPORTED_FORMATS: ClassVar[FrozenSet[str]] = frozenset({'.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm'})
     MAX_FILE_SIZE_MB = 25
     
+    # Uploads above this size are transcoded to 16 kHz mono Opus first
+    COMPRESSION_THRESHOLD_MB = 1
+    COMPRESSION_BITRATE = "24k"
+    
+    # Read buffer for uploads (1 MB per syscall instead of the default 8 KB)
+    UPLOAD_BUFFER_SIZE = 1024 * 1024
+    
+    # Voice activity detection pre-filter settings
+    VAD_SAMPLE_RATE = 16000
+    VAD_WINDOW_SECONDS = 10
+    VAD_THRESHOLD = 0.5
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize the transcription service
@@ -33,14 +96,15 @@ class AudioTranscriptionService:
         
         # Load API key from settings if not provided
         if api_key is None:
-            settings = Settings()
+            settings = get_settings()
             api_key = settings.openai_api_key
             
             if not settings.validate_openai_key():
                 raise RuntimeError("OpenAI API key not found in settings or invalid")
         
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = AsyncOpenAI(api_key=self.api_key, http_client=get_shared_http_client())
+        
         self.logger.info("Audio Transcription Service initialized")
     
     async def transcribe_file(
@@ -74,39 +138,17 @@ class AudioTranscriptionService:
                     "file_path": filepath
                 }
             
-            # Perform transcription
-            self.logger.info(f"Transcribing audio file: {filepath}")
+            result = await self._transcribe_source(
+                filepath,
+                os.path.basename(filepath),
+                validation_result["file_size_mb"],
+                model,
+                language,
+                prompt
+            )
+            result["file_path"] = filepath
+            return result
             
-            with open(filepath, "rb") as audio_file:
-                # Prepare transcription parameters
-                transcription_params = {
-                    "model": model,
-                    "file": audio_file,
-                }
-                
-                # Add optional parameters
-                if language:
-                    transcription_params["language"] = language
-                if prompt:
-                    transcription_params["prompt"] = prompt
-                
-                # Call the OpenAI API
-                response = self.client.audio.transcriptions.create(**transcription_params)
-                
-                # Return successful result
-                result = {
-                    "success": True,
-                    "text": response.text,
-                    "model": model,
-                    "language": language,
-                    "file_path": filepath,
-                    "file_size_mb": validation_result["file_size_mb"],
-                    "prompt": prompt
-                }
-                
-                self.logger.info(f"Transcription successful: {len(response.text)} characters")
-                return result
-                
         except OpenAIError as e:
             self.logger.error(f"OpenAI API error during transcription: {e}")
             return {
@@ -145,23 +187,277 @@ class AudioTranscriptionService:
         Returns:
             Dict containing transcription result and metadata
         """
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix=Path(filename).suffix, delete=False) as temp_file:
-            temp_file.write(audio_bytes)
-            temp_path = temp_file.name
-        
         try:
-            # Transcribe the temporary file
-            result = await self.transcribe_file(temp_path, model, language, prompt)
-            if result:
-                result["original_filename"] = filename
+            if not audio_bytes:
+                return {
+                    "success": False,
+                    "error": "Audio data is empty",
+                    "text": "",
+                    "original_filename": filename
+                }
+            
+            # Upload straight from memory; OpenAI infers the format from the filename
+            result = await self._transcribe_source(
+                audio_bytes,
+                filename,
+                len(audio_bytes) / (1024 * 1024),
+                model,
+                language,
+                prompt
+            )
+            result["original_filename"] = filename
             return result
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-            except Exception as e:
-                self.logger.warning(f"Could not delete temporary file {temp_path}: {e}")
+            
+        except OpenAIError as e:
+            self.logger.error(f"OpenAI API error during transcription: {e}")
+            return {
+                "success": False,
+                "error": f"OpenAI API error: {str(e)}",
+                "text": "",
+                "original_filename": filename
+            }
+        except Exception as e:
+            self.logger.error(f"Unexpected error during transcription: {e}")
+            return {
+                "success": False,
+                "error": f"Transcription error: {str(e)}",
+                "text": "",
+                "original_filename": filename
+            }
+    
+    async def _transcribe_source(
+        self,
+        source: Union[str, bytes],
+        upload_name: str,
+        file_size_mb: float,
+        model: str,
+        language: Optional[str],
+        prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Run the pre-filter, compression and API call for a file path or bytes
+        
+        Args:
+            source: Path to an audio file or raw audio bytes
+            upload_name: Filename sent to OpenAI (determines format)
+            file_size_mb: Size of the original audio in MB
+            model: Whisper model to use
+            language: Optional language code
+            prompt: Optional prompt to guide transcription
+            
+        Returns:
+            Dict containing transcription result and metadata
+        """
+        # Skip the API call entirely when the clip contains no speech
+        if not await self._contains_speech(source):
+            self.logger.info(f"No speech detected, skipping transcription: {upload_name}")
+            return {
+                "success": True,
+                "text": "",
+                "skipped": "no_speech",
+                "model": model,
+                "language": language,
+                "file_size_mb": file_size_mb,
+                "prompt": prompt
+            }
+        
+        # Transcode large audio; Whisper resamples to 16 kHz mono anyway
+        compressed_audio = None
+        if file_size_mb > self.COMPRESSION_THRESHOLD_MB:
+            compressed_audio = await self._compress_audio(source)
+        
+        upload_size_mb = (
+            len(compressed_audio) / (1024 * 1024) if compressed_audio is not None
+            else file_size_mb
+        )
+        if upload_size_mb > self.MAX_FILE_SIZE_MB:
+            error = f"File size ({upload_size_mb:.2f} MB) exceeds {self.MAX_FILE_SIZE_MB} MB limit"
+            self.logger.error(f"File validation failed: {error}")
+            return {
+                "success": False,
+                "error": error,
+                "text": ""
+            }
+        
+        # Perform transcription
+        self.logger.info(f"Transcribing audio: {upload_name}")
+        
+        if compressed_audio is not None:
+            ogg_name = f"{os.path.splitext(upload_name)[0]}.ogg"
+            response = await self._create_transcription((ogg_name, compressed_audio), model, language, prompt)
+        elif isinstance(source, (bytes, bytearray)):
+            response = await self._create_transcription((upload_name, source), model, language, prompt)
+        else:
+            with open(source, "rb", buffering=self.UPLOAD_BUFFER_SIZE) as audio_file:
+                response = await self._create_transcription(audio_file, model, language, prompt)
+        
+        self.logger.info(f"Transcription successful: {len(response.text)} characters")
+        return {
+            "success": True,
+            "text": response.text,
+            "model": model,
+            "language": language,
+            "file_size_mb": file_size_mb,
+            "upload_size_mb": upload_size_mb,
+            "compressed": compressed_audio is not None,
+            "prompt": prompt
+        }
+    
+    async def _create_transcription(
+        self,
+        audio_file: Any,
+        model: str,
+        language: Optional[str],
+        prompt: Optional[str]
+    ) -> Any:
+        """
+        Call the OpenAI transcription endpoint
+        
+        Args:
+            audio_file: File object or (filename, bytes) tuple to upload
+            model: Whisper model to use
+            language: Optional language code
+            prompt: Optional prompt to guide transcription
+            
+        Returns:
+            OpenAI transcription response
+        """
+        # Prepare transcription parameters
+        transcription_params = {
+            "model": model,
+            "file": audio_file,
+        }
+        
+        # Add optional parameters
+        if language:
+            transcription_params["language"] = language
+        if prompt:
+            transcription_params["prompt"] = prompt
+        
+        # Call the OpenAI API
+        return await self.client.audio.transcriptions.create(**transcription_params)
+    
+    async def _compress_audio(self, source: Union[str, bytes]) -> Optional[bytes]:
+        """
+        Transcode audio to 16 kHz mono Opus (Ogg container) with ffmpeg
+        
+        Args:
+            source: Path to an audio file or raw audio bytes
+            
+        Returns:
+            Compressed audio bytes, or None if ffmpeg is unavailable, fails,
+            or does not produce a smaller payload
+        """
+        if not ffmpeg_available:
+            return None
+        
+        from_bytes = isinstance(source, (bytes, bytearray))
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0" if from_bytes else source,
+            "-vn", "-ac", "1", "-ar", "16000",
+            "-c:a", "libopus", "-b:a", self.COMPRESSION_BITRATE,
+            "-f", "ogg", "pipe:1"
+        ]
+        
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE if from_bytes else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            compressed, stderr = await process.communicate(source if from_bytes else None)
+        except Exception as e:
+            self.logger.warning(f"Audio compression failed, uploading original: {e}")
+            return None
+        
+        if process.returncode != 0 or not compressed:
+            self.logger.warning(f"ffmpeg could not transcode audio, uploading original: {stderr.decode(errors='ignore').strip()}")
+            return None
+        
+        original_size = len(source) if from_bytes else os.path.getsize(source)
+        if len(compressed) >= original_size:
+            return None
+        
+        self.logger.info(f"Compressed audio for upload: {original_size} -> {len(compressed)} bytes")
+        return compressed
+    
+    async def _contains_speech(self, source: Union[str, bytes]) -> bool:
+        """
+        Run the local VAD pre-filter over the start of the audio
+        
+        Args:
+            source: Path to an audio file or raw audio bytes
+            
+        Returns:
+            False only when VAD ran and found no speech, True otherwise
+        """
+        if not vad_available or _vad_load_failed:
+            return True
+        
+        try:
+            return await asyncio.to_thread(self._detect_speech, source)
+        except Exception as e:
+            # Never block a transcription because the pre-filter failed
+            self.logger.warning(f"VAD pre-filter failed, sending audio to Whisper: {e}")
+            return True
+    
+    def _detect_speech(self, source: Union[str, bytes]) -> bool:
+        """
+        Decode the first seconds of audio to 16 kHz mono and look for speech
+        
+        Args:
+            source: Path to an audio file or raw audio bytes
+            
+        Returns:
+            True if speech was detected or the clip is longer than the VAD window
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        
+        max_samples = self.VAD_SAMPLE_RATE * self.VAD_WINDOW_SECONDS
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=self.VAD_SAMPLE_RATE)
+        chunks = []
+        sample_count = 0
+        
+        with av.open(source) as container:
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    samples = resampled.to_ndarray()[0]
+                    chunks.append(samples)
+                    sample_count += samples.shape[0]
+                if sample_count >= max_samples:
+                    break
+        
+        if not chunks:
+            return False
+        
+        # Only short clips are judged; longer recordings always go to Whisper
+        if sample_count > max_samples:
+            return True
+        
+        audio = np.concatenate(chunks)
+        speech = _speech_timestamps(audio, self.VAD_THRESHOLD, self.VAD_SAMPLE_RATE)
+        # No model means no verdict; let Whisper decide
+        return speech is None or len(speech) > 0
+    
+    @staticmethod
+    def _file_extension(filepath: str) -> str:
+        """
+        Get the lowercase file extension (including the dot) of a path
+        
+        Args:
+            filepath: Path to audio file
+            
+        Returns:
+            Extension such as '.mp3', or an empty string if there is none
+        """
+        dot = filepath.rfind(".")
+        # A dot in a directory name or a leading dot (hidden file) is not a suffix
+        if dot <= max(filepath.rfind("/"), filepath.rfind("\\")) + 1:
+            return ""
+        return filepath[dot:].lower()
     
     def _validate_audio_file(self, filepath: str) -> Dict[str, Any]:
         """
@@ -181,9 +477,9 @@ class AudioTranscriptionService:
             }
         
         # Check file extension
-        file_ext = Path(filepath).suffix.lower()
+        file_ext = self._file_extension(filepath)
         if file_ext not in self.SUPPORTED_FORMATS:
-            self.logger.warning(f"File extension {file_ext} not in supported formats: {self.SUPPORTED_FORMATS}")
+            self.logger.warning(f"File extension {file_ext} not in supported formats: {self.get_supported_formats()}")
             # Don't fail here, let OpenAI decide
         
         # Check file size
@@ -191,7 +487,9 @@ class AudioTranscriptionService:
             file_size = os.path.getsize(filepath)
             file_size_mb = file_size / (1024 * 1024)
             
-            if file_size > self.MAX_FILE_SIZE_MB * 1024 * 1024:
+            # Oversized files may still fit once transcoded, so only reject
+            # them here when compression is not possible
+            if file_size > self.MAX_FILE_SIZE_MB * 1024 * 1024 and not ffmpeg_available:
                 return {
                     "valid": False,
                     "error": f"File size ({file_size_mb:.2f} MB) exceeds {self.MAX_FILE_SIZE_MB} MB limit"
@@ -211,19 +509,19 @@ class AudioTranscriptionService:
     
     async def test_connection(self) -> bool:
         """
-        Test connection to OpenAI API with a simple transcription
+        Test connection to OpenAI API by looking up the Whisper model
+        
+        The models endpoint is free, yet still warms up DNS, TLS and the
+        shared connection pool like a real request.
         
         Returns:
             True if connection successful, False otherwise
         """
         try:
-            # Create a simple test audio using TTS (if available)
-            test_text = "Hello, this is a test."
-            
-            # For now, just test if we can access the API
-            # In a full implementation, you might create a small test audio file
             self.logger.info("Testing OpenAI Whisper API connection")
-            return True  # We'll assume it works if the client was created successfully
+            await self.client.models.retrieve("whisper-1")
+            self.logger.info("Whisper API connection test successful")
+            return True
             
         except Exception as e:
             self.logger.error(f"Connection test failed: {e}")
@@ -236,7 +534,7 @@ class AudioTranscriptionService:
         Returns:
             List of supported file extensions
         """
-        return self.SUPPORTED_FORMATS.copy()
+        return sorted(self.SUPPORTED_FORMATS)
     
     def get_max_file_size_mb(self) -> int:
         """
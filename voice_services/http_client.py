@@ -0,0 +1,59 @@
+"""
+Shared HTTP client for OpenAI calls
+Keeps one pooled (HTTP/2 when available) connection set per process
+so voice services reuse TCP/TLS sessions instead of opening their own
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    http2_available = True
+except ImportError:
+    http2_available = False
+
+logger = logging.getLogger(__name__)
+
+# Connection pool limits shared by every service using the client
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+REQUEST_TIMEOUT_SECONDS = 60.0
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client, creating it on first use
+    
+    Returns:
+        Shared httpx.AsyncClient with connection pooling
+    """
+    global _shared_client
+    
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            http2=http2_available,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+        logger.info(f"Shared HTTP client created (http2={http2_available})")
+    
+    return _shared_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the process-wide HTTP client if it was created"""
+    global _shared_client
+    
+    if _shared_client is not None and not _shared_client.is_closed:
+        await _shared_client.aclose()
+        logger.info("Shared HTTP client closed")
+    
+    _shared_client = None
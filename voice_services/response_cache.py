@@ -0,0 +1,293 @@
+"""
+Semantic Response Cache
+Caches parsed AI agent responses so repeated or near-duplicate prompts
+can skip the OpenAI round-trip
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, Awaitable
+
+import numpy as np
+
+# Prompts naming specific values (numbers, emails, quoted text, capitalized names
+# after the first word) only get exact hits; otherwise "create customer Jane Smith"
+# could be answered with the data extracted for "create customer John Smith"
+_ENTITY_PATTERN = re.compile(r"\d|@|[\"“”«»]|(?<=\S\s)[A-Z]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_TERMINAL_PUNCTUATION = ".!?;:,… "
+
+EmbedFunc = Callable[[str], Awaitable[List[float]]]
+
+
+@dataclass
+class _CacheEntry:
+    """A cached response and its expiry"""
+    namespace: str
+    prompt: str
+    response: Dict[str, Any]
+    expires_at: float
+
+
+class _NamespaceIndex:
+    """
+    Embeddings of one namespace in a preallocated float32 matrix
+
+    Rows are appended into spare capacity (doubled when full) and removed
+    by moving the last row into the gap, so neither operation copies the
+    whole matrix.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, dimensions: int):
+        self.keys: List[str] = []
+        self.matrix = np.empty((self.INITIAL_CAPACITY, dimensions), dtype=np.float32)
+
+    def append(self, key: str, embedding: np.ndarray) -> None:
+        """Add the embedding of an entry"""
+        size = len(self.keys)
+        if size == self.matrix.shape[0]:
+            grown = np.empty((size * 2, self.matrix.shape[1]), dtype=np.float32)
+            grown[:size] = self.matrix
+            self.matrix = grown
+        self.matrix[size] = embedding
+        self.keys.append(key)
+
+    def remove(self, key: str) -> bool:
+        """Remove the embedding of an entry, returning whether it was indexed"""
+        try:
+            position = self.keys.index(key)
+        except ValueError:
+            return False
+        last = len(self.keys) - 1
+        if position != last:
+            self.matrix[position] = self.matrix[last]
+            self.keys[position] = self.keys[last]
+        self.keys.pop()
+        return True
+
+
+class SemanticResponseCache:
+    """
+    Two-tier cache for agent responses
+
+    Exact matches are looked up by a SHA-256 key of (namespace, prompt).
+    On a miss, the prompt embedding is compared against earlier prompts of
+    the same namespace and the closest response is reused when its cosine
+    similarity reaches the threshold. Only prompts without specific values
+    (names, numbers, emails) take part in the semantic tier, and prompts of
+    namespaces without embeddings yet are embedded in the background after
+    the response is stored, so a cold namespace never waits for embeddings.
+    """
+
+    def __init__(
+        self,
+        embed_func: Optional[EmbedFunc] = None,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: int = 3600,
+        max_entries: int = 10000
+    ):
+        """
+        Initialize the response cache
+
+        Args:
+            embed_func: Coroutine returning an embedding for a text (semantic tier disabled if None)
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            ttl_seconds: Time to live of cached responses
+            max_entries: Maximum number of cached responses (LRU eviction)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.embed_func = embed_func
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # namespace -> embeddings of its entries
+        self._index: Dict[str, _NamespaceIndex] = {}
+        # Background embedding tasks, referenced until done
+        self._pending: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def make_namespace(*parts: Any) -> str:
+        """
+        Build a namespace key from everything that affects the response
+
+        Args:
+            parts: Model, agent type, system prompt, settings, etc.
+
+        Returns:
+            Hex digest identifying the namespace
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    @staticmethod
+    def _canonicalize(prompt: str) -> str:
+        """
+        Normalize a prompt so case, spacing and trailing punctuation
+        differences map to the same cache entry
+        """
+        return _WHITESPACE_PATTERN.sub(" ", prompt.lower()).strip().rstrip(_TERMINAL_PUNCTUATION)
+
+    @staticmethod
+    def _exact_key(namespace: str, prompt: str) -> str:
+        """Get the exact-match key for a prompt within a namespace"""
+        return hashlib.sha256(f"{namespace}|{prompt}".encode("utf-8")).hexdigest()
+
+    async def lookup(self, namespace: str, prompt: str) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Look up a cached response
+
+        Args:
+            namespace: Namespace from make_namespace
+            prompt: User prompt
+
+        Returns:
+            Tuple of (cached response or None, prompt embedding or None).
+            Pass the embedding back to store() to avoid computing it twice.
+        """
+        now = time.monotonic()
+        semantic = self._is_semantic_candidate(prompt)
+        prompt = self._canonicalize(prompt)
+
+        # Tier 1: exact match
+        key = self._exact_key(namespace, prompt)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.logger.info("Response cache hit (exact)")
+                return copy.deepcopy(entry.response), None
+            self._remove(key)
+
+        # Tier 2: semantic match; a cold namespace has nothing to compare
+        # against, so the completion is not delayed by an embedding call
+        index = self._index.get(namespace)
+        if not semantic or index is None:
+            return None, None
+
+        try:
+            embedding = self._normalize(await self.embed_func(prompt))
+        except Exception as e:
+            self.logger.warning(f"Could not embed prompt for response cache: {e}")
+            return None, None
+
+        # Entries may have been removed while embedding
+        index = self._index.get(namespace)
+        if index is None:
+            return None, embedding
+
+        keys = index.keys
+        similarities = index.matrix[:len(keys)] @ embedding
+        best = int(np.argmax(similarities))
+        best_key = keys[best]
+        candidate = self._entries.get(best_key)
+
+        if (
+            candidate is not None
+            and candidate.expires_at > now
+            and similarities[best] >= self.similarity_threshold
+        ):
+            self._entries.move_to_end(best_key)
+            self.logger.info(f"Response cache hit (semantic, similarity {similarities[best]:.3f})")
+            return copy.deepcopy(candidate.response), embedding
+
+        return None, embedding
+
+    def store(
+        self,
+        namespace: str,
+        prompt: str,
+        response: Dict[str, Any],
+        embedding: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Store a response in the cache
+
+        Args:
+            namespace: Namespace from make_namespace
+            prompt: User prompt
+            response: Parsed AI response
+            embedding: Normalized prompt embedding returned by lookup()
+        """
+        semantic = self._is_semantic_candidate(prompt)
+        prompt = self._canonicalize(prompt)
+        key = self._exact_key(namespace, prompt)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _CacheEntry(
+            namespace=namespace,
+            prompt=prompt,
+            response=copy.deepcopy(response),
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+
+        if embedding is not None:
+            self._index_entry(namespace, key, embedding)
+        elif semantic:
+            task = asyncio.create_task(self._embed_and_index(namespace, key, prompt))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+        # Evict least recently used entries
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _is_semantic_candidate(self, prompt: str) -> bool:
+        """Check whether a (raw) prompt may be matched by similarity"""
+        return self.embed_func is not None and not _ENTITY_PATTERN.search(prompt.strip())
+
+    def _index_entry(self, namespace: str, key: str, embedding: np.ndarray) -> None:
+        """Add the embedding of an entry to its namespace"""
+        index = self._index.get(namespace)
+        if index is None:
+            index = self._index[namespace] = _NamespaceIndex(embedding.shape[0])
+        index.append(key, embedding)
+
+    async def _embed_and_index(self, namespace: str, key: str, prompt: str) -> None:
+        """Embed a stored prompt off the request path and index it"""
+        try:
+            embedding = self._normalize(await self.embed_func(prompt))
+        except Exception as e:
+            self.logger.warning(f"Could not embed prompt for response cache: {e}")
+            return
+
+        # The entry may have been evicted or replaced while embedding
+        index = self._index.get(namespace)
+        if key in self._entries and (index is None or key not in index.keys):
+            self._index_entry(namespace, key, embedding)
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        self._entries.clear()
+        self._index.clear()
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry from both tiers"""
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.namespace not in self._index:
+            return
+
+        index = self._index[entry.namespace]
+        if index.remove(key) and not index.keys:
+            del self._index[entry.namespace]
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """L2-normalize an embedding so dot products are cosine similarities"""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
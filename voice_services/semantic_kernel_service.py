@@ -6,22 +6,406 @@ import semantic_kernel as sk
 from semantic_kernel.connectors.ai.open_ai import OpenAIChatCompletion
 from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import OpenAIChatPromptExecutionSettings
 from semantic_kernel.contents.chat_history import ChatHistory
-from semantic_kernel.core_plugins import MathPlugin, TimePlugin
-from semantic_kernel.functions import kernel_function
-from semantic_kernel.functions.kernel_function_decorator import kernel_function
 import asyncio
+import functools
+import importlib
+from contextlib import aclosing
+import httpx
 import logging
-from typing import Optional, Dict, Any, List
-import json
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple, AsyncIterator
+import orjson
 from datetime import datetime, timedelta
 
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, NotFoundError, PermissionDeniedError, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+try:
+    import redis.asyncio as aioredis
+    redis_available = True
+except ImportError:
+    redis_available = False
+
+try:
+    from partial_json_parser import loads as partial_json_loads
+    partial_json_available = True
+except ImportError:
+    partial_json_available = False
+
+try:
+    import tiktoken
+    tiktoken_available = True
+except ImportError:
+    tiktoken_available = False
+
 from config.settings import Settings
-from tools.invoice_tools import InvoiceTools
-from tools.customer_tools import CustomerTools
-from tools.quote_tools import QuoteTools
-from tools.job_tools import JobTools
-from tools.expense_tools import ExpenseTools
-from tools.manual_task_tools import ManualTaskTools
+from .http_client import get_shared_http_client
+from .response_cache import SemanticResponseCache
+
+# Tool modules are imported on first use (_get_agent_tools)
+if TYPE_CHECKING:
+    from tools.invoice_tools import InvoiceTools
+    from tools.customer_tools import CustomerTools
+    from tools.quote_tools import QuoteTools
+    from tools.job_tools import JobTools
+    from tools.expense_tools import ExpenseTools
+    from tools.manual_task_tools import ManualTaskTools
+
+# Errors worth retrying; Semantic Kernel wraps them, so causes are checked too
+_TRANSIENT_ERRORS = (httpx.TransportError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+def _is_transient_error(error: BaseException) -> bool:
+    """Check whether an error (or its cause) is a transient OpenAI failure"""
+    return isinstance(error, _TRANSIENT_ERRORS) or isinstance(error.__cause__, _TRANSIENT_ERRORS)
+
+
+# System prompts per agent and language, built once at import time
+_INVOICE_SYSTEM_PROMPTS = {
+    "en": """You are an AI assistant specialized in comprehensive invoice generation for Devia.
+
+ROLE: Analyze natural language requests and generate structured invoice data with full field support.
+
+AVAILABLE FUNCTIONS:
+- invoice.create_invoice: Create an invoice from natural language description with comprehensive field extraction
+- invoice.update_invoice: Update an existing invoice with all field support
+- invoice.delete_invoice: Delete an invoice
+- invoice.calculate_invoice_totals: Calculate totals (VAT, discounts, down payments)
+- invoice.generate_invoice_number: Generate unique invoice number
+- invoice.get_invoices: List invoices
+- invoice.get_invoice_by_id: Get invoice by ID
+- customer.extract_customer_data: Extract customer data from text
+
+COMPREHENSIVE INVOICE FIELDS SUPPORTED:
+- Client Information: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
+- Project Details: title, projectName, projectAddress, projectStreetAddress, projectZipCode, projectCity
+- Invoice Types: invoiceType (FINAL/INTERIM/ADVANCE/CREDIT)
+- Discount System: discount amount, discountType (FIXED/PERCENTAGE)
+- Down Payment System: downPayment amount, downPaymentType (FIXED/PERCENTAGE)
+- Multiple Notes: notes (general), internalNotes (private), publicNotes (client-visible)
+- Digital Signatures: contractorSignature, clientSignature (base64 encoded)
+- Enhanced Fields: quoteId (for quote conversion), userId
+
+VOICE-OPTIMIZED INSTRUCTIONS:
+1. Process voice-transcribed text that may have speech-to-text artifacts.
+2. Extract comprehensive client and project information from conversational input.
+3. Identify invoice type from natural speech patterns ("final bill", "down payment", "interim invoice").
+4. Parse spoken numbers and percentages for discounts and down payments.
+5. Distinguish between different note types from conversational context.
+6. Handle informal speech patterns while maintaining data accuracy.
+7. When calling get_* functions, ALWAYS include the user_id parameter from context.
+8. Return structured data as JSON optimized for voice response formatting.
+
+ALWAYS return valid JSON with the enhanced invoice structure supporting all new fields.""",
+    "fr": """Tu es un assistant IA spécialisé dans la génération complète de factures pour Devia.
+
+RÔLE: Analyser les demandes vocales et générer des données de facture structurées avec support complet.
+
+FONCTIONS DISPONIBLES:
+- invoice.create_invoice: Créer une facture avec extraction complète des champs
+- invoice.update_invoice: Mettre à jour une facture avec support de tous les champs
+- invoice.delete_invoice: Supprimer une facture
+- invoice.calculate_invoice_totals: Calculer les totaux (TVA, remises, acomptes)
+- invoice.generate_invoice_number: Générer un numéro de facture unique
+- invoice.get_invoices: Lister les factures
+- invoice.get_invoice_by_id: Récupérer une facture par ID
+- customer.extract_customer_data: Extraire les données client
+
+CHAMPS COMPLETS DE FACTURE SUPPORTÉS:
+- Informations Client: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
+- Détails Projet: title, projectName, projectAddress, projectStreetAddress, projectZipCode, projectCity
+- Types Facture: invoiceType (FINAL/INTERIM/ADVANCE/CREDIT)
+- Système Remise: montant, discountType (FIXED/PERCENTAGE)
+- Système Acompte: montant, downPaymentType (FIXED/PERCENTAGE)
+- Notes Multiples: notes (générales), internalNotes (privées), publicNotes (client)
+- Signatures: contractorSignature, clientSignature
+
+INSTRUCTIONS OPTIMISÉES VOIX:
+1. Traiter le texte transcrit vocal pouvant contenir des artefacts de reconnaissance.
+2. Extraire informations client et projet depuis input conversationnel.
+3. Identifier type facture depuis patterns vocaux ("facture finale", "acompte", "facture intermédiaire").
+4. Analyser nombres et pourcentages parlés pour remises et acomptes.
+5. Distinguer types de notes depuis contexte conversationnel.
+6. Gérer patterns de parole informels en maintenant précision.
+7. Lors d'appels get_*, TOUJOURS inclure user_id depuis contexte.
+8. Retourner JSON structuré optimisé pour réponse vocale.
+
+TOUJOURS retourner JSON valide avec structure facture améliorée."""
+}
+
+_CUSTOMER_SYSTEM_PROMPTS = {
+    "en": """You are an AI assistant specialized in customer data extraction and management for Devia.
+
+ROLE: Analyze natural language text to extract structured customer information.
+
+AVAILABLE FUNCTIONS:
+- customer.extract_customer_data: Extract customer data from text
+- customer.validate_customer_info: Validate customer information
+- customer.format_address: Format address information
+- customer.generate_customer_id: Generate unique customer ID
+
+INSTRUCTIONS:
+1. Analyze text to identify customer information
+2. Extract name, email, phone, address, company
+3. Validate and format the data
+4. Generate unique ID if needed
+5. Return structured data as JSON
+
+ALWAYS return valid JSON with customer structure.""",
+    "fr": """Tu es un assistant IA spécialisé dans l'extraction et la gestion des données client pour Devia.
+
+RÔLE: Analyser du texte en langage naturel pour extraire des informations client structurées.
+
+FONCTIONS DISPONIBLES:
+- customer.extract_customer_data: Extraire les données client du texte
+- customer.validate_customer_info: Valider les informations client
+- customer.format_address: Formater l'adresse
+- customer.generate_customer_id: Générer un ID client unique
+
+INSTRUCTIONS:
+1. Analyser le texte pour identifier les informations client
+2. Extraire nom, email, téléphone, adresse, entreprise
+3. Valider et formater les données
+4. Générer un ID unique si nécessaire
+5. Retourner les données structurées en JSON
+
+TOUJOURS retourner un JSON valide avec la structure client."""
+}
+
+_QUOTE_SYSTEM_PROMPTS = {
+    "en": """You are an AI assistant specialized in comprehensive quote generation for Devia.
+
+ROLE: Analyze natural language requests and generate structured quote data with full field support.
+
+AVAILABLE FUNCTIONS:
+- quote.create_quote: Create a quote from natural language description with comprehensive field extraction
+- quote.update_quote: Update an existing quote with all field support
+- quote.delete_quote: Delete a quote
+- quote.calculate_quote_totals: Calculate totals (VAT, discounts, down payments)
+- quote.get_quotes: List quotes
+- quote.get_quote_by_id: Get quote by ID
+
+COMPREHENSIVE QUOTE FIELDS SUPPORTED:
+- Client Information: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
+- Project Details: title, projectName, projectStreetAddress, projectZipCode, projectCity
+- Discount System: discount amount, discountType (FIXED/PERCENTAGE)
+- Down Payment System: downPayment amount, downPaymentType (FIXED/PERCENTAGE)
+- Multiple Notes: internalNotes (private), publicNotes (client-visible)
+- Digital Signatures: contractorSignature, clientSignature
+- Validity: validUntil (quote expiration date)
+
+INSTRUCTIONS:
+1. Analyze the request to identify all project and client elements.
+2. Extract comprehensive client information including company type (individual vs company).
+3. Identify project details (name, full address components including ZIP and city).
+4. Parse discount information including type (percentage vs fixed amount).
+5. Extract down payment details if mentioned (percentage or fixed amount).
+6. Categorize notes into internal (private) or public (client-visible).
+7. Calculate totals considering discounts, down payments, and VAT.
+8. When calling get_* functions, ALWAYS include user_id parameter from context.
+9. Return structured data as JSON, ready for the comprehensive API.
+
+ALWAYS return valid JSON with the enhanced quote structure supporting all new fields.""",
+    "fr": """Tu es un assistant IA spécialisé dans la génération complète de devis pour Devia.
+
+RÔLE: Analyser les demandes en langage naturel et générer des données de devis structurées avec support complet des champs.
+
+FONCTIONS DISPONIBLES:
+- quote.create_quote: Créer un devis avec extraction complète des champs
+- quote.update_quote: Mettre à jour un devis avec support de tous les champs
+- quote.delete_quote: Supprimer un devis
+- quote.calculate_quote_totals: Calculer les totaux (TVA, remises, acomptes)
+- quote.get_quotes: Lister les devis
+- quote.get_quote_by_id: Récupérer un devis par ID
+
+CHAMPS COMPLETS DE DEVIS SUPPORTÉS:
+- Informations Client: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
+- Détails Projet: title, projectName, projectStreetAddress, projectZipCode, projectCity
+- Système Remise: montant, discountType (FIXED/PERCENTAGE)
+- Système Acompte: montant, downPaymentType (FIXED/PERCENTAGE)
+- Notes Multiples: internalNotes (privées), publicNotes (visibles client)
+- Signatures: contractorSignature, clientSignature
+- Validité: validUntil (date d'expiration du devis)
+
+INSTRUCTIONS:
+1. Analyser la demande pour identifier tous les éléments projet et client.
+2. Extraire informations client complètes incluant type d'entreprise.
+3. Identifier détails projet (nom, adresse complète incluant code postal et ville).
+4. Analyser informations de remise incluant type (pourcentage vs montant fixe).
+5. Extraire détails d'acompte si mentionnés (pourcentage ou montant fixe).
+6. Catégoriser notes en internes (privées) ou publiques (visibles client).
+7. Calculer totaux en considérant remises, acomptes, et TVA.
+8. Lors d'appels get_*, TOUJOURS inclure user_id depuis contexte.
+9. Retourner données structurées en JSON, prêtes pour l'API complète.
+
+TOUJOURS retourner un JSON valide avec structure devis améliorée supportant tous nouveaux champs."""
+}
+
+_JOB_SYSTEM_PROMPTS = {
+    "en": """You are an AI assistant specialized in comprehensive calendar and business management for Devia.
+
+ROLE: Analyze natural language requests and manage jobs, meetings, clients, expenses, invoices, and quotes.
+
+AVAILABLE FUNCTIONS:
+DATA RETRIEVAL (returns real database data):
+- job.get_jobs: Retrieve jobs list
+- job.get_meetings: Retrieve meetings
+- job.get_clients: Retrieve clients
+- job.get_expenses: Retrieve expenses
+- job.get_invoices: Retrieve invoices
+- job.get_quotes: Retrieve quotes
+
+API OPERATIONS (returns API call structures):
+- job.create_job_api_call: Create a job
+- job.update_job_api_call: Update a job
+- job.delete_job_api_call: Delete a job
+- job.create_meeting_api_call: Create a meeting
+- job.update_meeting_api_call: Update a meeting
+- job.delete_meeting_api_call: Delete a meeting
+
+LEGACY FUNCTIONS (still available):
+- job.create_job_from_text: Create job from text description
+- job.parse_schedule_info: Parse scheduling information
+- job.validate_schedule: Validate schedule feasibility
+- job.suggest_optimal_times: Suggest optimal time slots
+- job.reschedule_job: Reschedule an existing job
+- time.get_current_time: Get current time
+
+INSTRUCTIONS:
+1. For VIEWING data, use get_* functions (return real data).
+2. For CREATE/UPDATE/DELETE, use *_api_call functions (return API structures).
+3. Use legacy functions for analysis and suggestions.
+4. Parse and convert time expressions to dates.
+5. Return data exactly as received from functions.
+
+ALWAYS return valid JSON with appropriate structure.""",
+    "fr": """Tu es un assistant IA spécialisé dans la gestion complète de calendrier et d'affaires pour Devia.
+
+RÔLE: Analyser les demandes en langage naturel et gérer jobs, réunions, clients, dépenses, factures et devis.
+
+FONCTIONS DISPONIBLES:
+DATA RETRIEVAL (retourne données réelles de la base):
+- job.get_jobs: Récupérer la liste des jobs
+- job.get_meetings: Récupérer les réunions
+- job.get_clients: Récupérer les clients
+- job.get_expenses: Récupérer les dépenses
+- job.get_invoices: Récupérer les factures
+- job.get_quotes: Récupérer les devis
+
+API OPERATIONS (retourne structures d'appel API):
+- job.create_job_api_call: Créer un job
+- job.update_job_api_call: Modifier un job
+- job.delete_job_api_call: Supprimer un job
+- job.create_meeting_api_call: Créer une réunion
+- job.update_meeting_api_call: Modifier une réunion
+- job.delete_meeting_api_call: Supprimer une réunion
+
+LEGACY FUNCTIONS (toujours disponibles):
+- job.create_job_from_text: Créer un travail à partir du texte
+- job.parse_schedule_info: Analyser les informations de planification
+- job.validate_schedule: Valider le planning
+- job.suggest_optimal_times: Suggérer des créneaux optimaux
+- job.reschedule_job: Replanifier un travail existant
+- time.get_current_time: Obtenir l'heure actuelle
+
+INSTRUCTIONS:
+1. Pour CONSULTER des données, utiliser les fonctions get_* (retournent données réelles).
+2. Pour CRÉER/MODIFIER/SUPPRIMER, utiliser les fonctions *_api_call (retournent structure API).
+3. Utiliser les fonctions legacy pour analyse et suggestions.
+4. Analyser et convertir les expressions temporelles en dates.
+5. Retourner les données exactement comme reçues des fonctions.
+
+TOUJOURS retourner un JSON valide avec la structure appropriée."""
+}
+
+_EXPENSE_SYSTEM_PROMPTS = {
+    "en": """You are an AI assistant specialized in expense tracking for Devia.
+
+ROLE: Analyze receipt text or expense descriptions to create structured expense data.
+
+AVAILABLE FUNCTIONS:
+- expense.extract_expense_from_text: Extract expense from text
+- expense.categorize_expense: Categorize the expense
+- expense.calculate_vat: Calculate VAT amount
+- expense.parse_receipt: Parse receipt information
+
+INSTRUCTIONS:
+1. Analyze text to identify expense information
+2. Extract description, amount, date, vendor
+3. Automatically categorize the expense
+4. Calculate VAT if applicable
+5. Generate unique expense ID
+6. Return structured data as JSON
+
+ALWAYS return valid JSON with expense structure.""",
+    "fr": """Tu es un assistant IA spécialisé dans le suivi des dépenses pour Devia.
+
+RÔLE: Analyser du texte de reçus ou des descriptions de dépenses pour créer des données de dépense structurées.
+
+FONCTIONS DISPONIBLES:
+- expense.extract_expense_from_text: Extraire une dépense du texte
+- expense.categorize_expense: Catégoriser la dépense
+- expense.calculate_vat: Calculer la TVA
+- expense.parse_receipt: Analyser un reçu
+
+INSTRUCTIONS:
+1. Analyser le texte pour identifier les informations de dépense
+2. Extraire description, montant, date, fournisseur
+3. Catégoriser automatiquement la dépense
+4. Calculer la TVA si applicable
+5. Générer un ID de dépense unique
+6. Retourner les données structurées en JSON
+
+TOUJOURS retourner un JSON valide avec la structure de dépense."""
+}
+
+_MANUAL_TASK_SYSTEM_PROMPT_TEMPLATE = """You are an AI assistant for manual task management and planning.
+        
+LANGUAGE: Use {language} (English/French) for responses.
+
+ROLE: Analyze manual task descriptions to create structured internal task data.
+
+AVAILABLE FUNCTIONS:
+- manual_task.extract_task_info: Extract task information from text
+- manual_task.set_priority: Set task priority level
+- manual_task.set_color: Set task color for visual organization
+- manual_task.parse_schedule: Parse date and time information
+- manual_task.create_task: Create a new manual task
+
+INSTRUCTIONS:
+1. Analyze text to identify task information (title, timing, priority)
+2. Extract color information if mentioned (red, blue, green, yellow, etc.)
+3. Parse date/time information (tomorrow, specific dates, time ranges)
+4. Determine task priority (high, medium, low)
+5. Extract duration or time blocks (9-5, 2 hours, etc.)
+6. Generate unique task ID
+7. Return structured task data as JSON
+
+TASK TYPES:
+- Internal planning tasks
+- Team coordination
+- Personal reminders
+- Maintenance tasks
+- Color-coded organization tasks
+
+ALWAYS return valid JSON with manual task structure."""
+
+_MANUAL_TASK_SYSTEM_PROMPTS = {
+    language: _MANUAL_TASK_SYSTEM_PROMPT_TEMPLATE.format(language=language)
+    for language in ("en", "fr")
+}
+
+# System prompts by agent type, then language
+_SYSTEM_PROMPTS: Dict[str, Dict[str, str]] = {
+    "invoice": _INVOICE_SYSTEM_PROMPTS,
+    "customer": _CUSTOMER_SYSTEM_PROMPTS,
+    "quote": _QUOTE_SYSTEM_PROMPTS,
+    "job": _JOB_SYSTEM_PROMPTS,
+    "expense": _EXPENSE_SYSTEM_PROMPTS,
+    "manual_task": _MANUAL_TASK_SYSTEM_PROMPTS,
+}
+
 
 class SemanticKernelService:
     """
@@ -29,24 +413,158 @@ class SemanticKernelService:
     and orchestrates all AI agents and tools for business automation
     """
     
-    def __init__(self, settings: Settings):
-        """Initialize the Semantic Kernel service"""
+    # Embedding model used by the semantic response cache
+    CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+    # Only near-deterministic requests may reuse a cached response
+    CACHE_MAX_TEMPERATURE = 0.1
+    
+    # Agent type -> (tool attribute, tool module, tool class), registered under the agent type as plugin name
+    _AGENT_TOOLS = {
+        "invoice": ("invoice_tools", "tools.invoice_tools", "InvoiceTools"),
+        "customer": ("customer_tools", "tools.customer_tools", "CustomerTools"),
+        "quote": ("quote_tools", "tools.quote_tools", "QuoteTools"),
+        "job": ("job_tools", "tools.job_tools", "JobTools"),
+        "expense": ("expense_tools", "tools.expense_tools", "ExpenseTools"),
+        "manual_task": ("manual_task_tools", "tools.manual_task_tools", "ManualTaskTools"),
+    }
+    
+    # How long a connection test result is reused by health checks
+    CONNECTION_TEST_TTL_SECONDS = 60
+    # Upper bound on a connection test, retries included
+    CONNECTION_TEST_TIMEOUT_SECONDS = 5.0
+    # Connection test result shared between replicas when Redis is configured
+    PROBE_REDIS_KEY = "sk:openai:probe"
+    PROBE_REDIS_TTL_SECONDS = 30
+    # Redis is only a shortcut; an unreachable host must not stall the check
+    REDIS_TIMEOUT_SECONDS = 0.5
+    
+    # Maximum concurrent OpenAI chat requests, kept below the account rate limits
+    MAX_CONCURRENT_REQUESTS = 64
+    
+    # Converted conversation histories kept for follow-up turns
+    SESSION_HISTORY_TTL_SECONDS = 1800
+    MAX_SESSION_HISTORIES = 1000
+    
+    # Characters after which a streamed JSON value may have been completed
+    _JSON_VALUE_ENDINGS = frozenset(',}]"')
+    
+    # Responses longer than this (in characters) are parsed in a worker thread
+    THREAD_PARSE_THRESHOLD = 16384
+    
+    # User message template; static parts first, volatile values last
+    _USER_PROMPT_TEMPLATE = "User request: {prompt}\n\nCurrent time: {current_time}{context_info}{language_note}"
+    _LANGUAGE_NOTES = {"fr": "\n\nRéponds en français."}
+    
+    # Output token budget per agent request
+    MAX_OUTPUT_TOKENS = 2000
+    # Context window of the chat models, with a safety margin for message framing
+    # (unknown models keep MAX_OUTPUT_TOKENS unchecked)
+    MODEL_CONTEXT_LIMITS = {
+        "gpt-4": 8192,
+        "gpt-4-32k": 32768,
+        "gpt-3.5-turbo": 16385,
+        "gpt-4-turbo": 128000,
+        "gpt-4-turbo-preview": 128000,
+        "gpt-4-1106-preview": 128000,
+        "gpt-4-0125-preview": 128000,
+        "gpt-4o": 128000,
+        "gpt-4o-mini": 128000,
+    }
+    # Token counts memoized per text (system prompts, business context, history messages)
+    TOKEN_COUNT_CACHE_SIZE = 4096
+    # Chat models that reject response_format; JSON mode needs gpt-4-turbo,
+    # gpt-3.5-turbo-1106 or newer
+    JSON_MODE_UNSUPPORTED_MODELS = frozenset({
+        "gpt-4", "gpt-4-0314", "gpt-4-0613",
+        "gpt-4-32k", "gpt-4-32k-0314", "gpt-4-32k-0613",
+        "gpt-3.5-turbo-0301", "gpt-3.5-turbo-0613", "gpt-3.5-turbo-16k", "gpt-3.5-turbo-16k-0613",
+    })
+    TOKEN_SAFETY_MARGIN = 64
+    
+    # Agent type -> (success messages, failed action)
+    _AGENTS = {
+        "invoice": ({"en": "Invoice generated successfully", "fr": "Facture générée avec succès"}, "generate invoice"),
+        "customer": ({"en": "Customer data extracted successfully", "fr": "Données client extraites avec succès"}, "extract customer data"),
+        "quote": ({"en": "Quote generated successfully", "fr": "Devis généré avec succès"}, "generate quote"),
+        "job": ({"en": "Job scheduled successfully", "fr": "Travail programmé avec succès"}, "schedule job"),
+        "expense": ({"en": "Expense tracked successfully", "fr": "Dépense enregistrée avec succès"}, "track expense"),
+        "manual_task": ({"en": "Manual task created successfully", "fr": "Tâche manuelle créée avec succès"}, "create manual task"),
+    }
+    
+    def __init__(self, settings: Settings, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the Semantic Kernel service
+        
+        Args:
+            settings: Application settings
+            http_client: HTTP client for OpenAI calls (defaults to the shared pooled client)
+        """
         self.settings = settings
+        # Never closed here: an injected client belongs to the caller and the shared
+        # pool, also used by the audio services, is closed by the app lifespan
+        self._http_client = http_client
         self.kernel: Optional[sk.Kernel] = None
         self.chat_service: Optional[OpenAIChatCompletion] = None
+        self.openai_client: Optional[AsyncOpenAI] = None
+        self._execution_settings: Optional[OpenAIChatPromptExecutionSettings] = None
+        
+        # Tokenizer used to size max_tokens (None if tiktoken is missing)
+        self._enc = None
+        self._context_limit: Optional[int] = self.MODEL_CONTEXT_LIMITS.get(settings.openai_model)
+        # History messages are counted once, not again on every later turn
+        self._cached_token_count = functools.lru_cache(maxsize=self.TOKEN_COUNT_CACHE_SIZE)(self._count_tokens)
         self._initialized = False
         
         # Tool instances
-        self.invoice_tools: Optional[InvoiceTools] = None
-        self.customer_tools: Optional[CustomerTools] = None
-        self.quote_tools: Optional[QuoteTools] = None
-        self.job_tools: Optional[JobTools] = None
-        self.expense_tools: Optional[ExpenseTools] = None
-        self.manual_task_tools: Optional[ManualTaskTools] = None
-        
-        # Configure logging
-        logging.basicConfig(level=getattr(logging, settings.sk_log_level))
+        self.invoice_tools: Optional["InvoiceTools"] = None
+        self.customer_tools: Optional["CustomerTools"] = None
+        self.quote_tools: Optional["QuoteTools"] = None
+        self.job_tools: Optional["JobTools"] = None
+        self.expense_tools: Optional["ExpenseTools"] = None
+        self.manual_task_tools: Optional["ManualTaskTools"] = None
+        # Converted conversation prefixes by session id:
+        # (system prompt, history, synced message count, last synced message, last used)
+        self._histories: "OrderedDict[str, Tuple[str, ChatHistory, int, Optional[Dict], float]]" = OrderedDict()
+        self._inflight_sem = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        # One lock per agent so different tools can initialize concurrently
+        self._tools_locks = {agent_type: asyncio.Lock() for agent_type in self._AGENT_TOOLS}
+        # Registered tools by agent type; the named attributes above stay for callers
+        self._tools: Dict[str, Any] = {}
+        # Created tools that have a cleanup method, collected at registration
+        self._cleanupable_tools: List[Any] = []
+        
+        # Last connection test as (monotonic time, result)
+        self._conn_test_cache: Optional[Tuple[float, bool]] = None
+        self._inflight_test: Optional[asyncio.Future] = None
+        self._redis = None
+        
+        # Connection test prompt and settings never change, so build them once
+        self._test_history = ChatHistory()
+        self._test_history.add_user_message("Test connection - respond with 'OK'")
+        self._test_settings = OpenAIChatPromptExecutionSettings(
+            ai_model_id=settings.openai_model,
+            max_tokens=1,
+            temperature=0.1
+        )
+        
+        # Company settings never change at runtime, so format them once
+        self._business_context = (
+            f"Company: {settings.company_name}\n"
+            f"Default VAT rate: {settings.default_vat_rate}%\n"
+            f"Default currency: {settings.default_currency}"
+        )
+        
+        # Minute-resolution timestamp shared by requests within the same minute
+        self._current_time = ""
+        self._current_time_expiry = 0.0
+        
+        # Response cache (exact + embedding similarity) in front of OpenAI
+        self.embedding_client: Optional[AsyncOpenAI] = None
+        self.response_cache: Optional[SemanticResponseCache] = None
+        
+        # Root logging is configured by the application; only set this logger's level
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(getattr(logging, settings.sk_log_level.upper(), logging.INFO))
     
     async def initialize(self) -> None:
         """Initialize Semantic Kernel and all tools"""
@@ -60,28 +578,58 @@ class SemanticKernelService:
             # Create kernel
             self.kernel = sk.Kernel()
             
+            # One OpenAI client on the pooled HTTP connections, shared by
+            # chat completion and the response cache embeddings
+            self.openai_client = AsyncOpenAI(
+                api_key=self.settings.openai_api_key,
+                http_client=self._http_client or get_shared_http_client()
+            )
+            
             # Add OpenAI chat completion service
             self.chat_service = OpenAIChatCompletion(
                 ai_model_id=self.settings.openai_model,
-                api_key=self.settings.openai_api_key,
+                async_client=self.openai_client,
                 service_id="chat_completion"
             )
             self.kernel.add_service(self.chat_service)
             
-            # Add core plugins
+            # Every agent prompt asks for JSON; JSON mode guarantees it parses
+            # on models that support it, _parse_response() copes otherwise
+            json_mode = {}
+            if self.settings.openai_model not in self.JSON_MODE_UNSUPPORTED_MODELS:
+                json_mode["response_format"] = {"type": "json_object"}
+            
+            # Execution settings are identical for every agent request
+            self._execution_settings = OpenAIChatPromptExecutionSettings(
+                service_id="chat_completion",
+                ai_model_id=self.settings.openai_model,
+                max_tokens=self.MAX_OUTPUT_TOKENS,
+                temperature=0.1,  # Low temperature for consistent results
+                top_p=0.9,
+                **json_mode
+            )
+            
+            # Load the tokenizer once; requests are sized against the context window
+            self._enc = self._load_encoding()
+            
+            # Optional Redis connection for results shared between replicas
+            if redis_available and self.settings.redis_url:
+                self._redis = aioredis.from_url(
+                    self.settings.redis_url,
+                    socket_connect_timeout=self.REDIS_TIMEOUT_SECONDS,
+                    socket_timeout=self.REDIS_TIMEOUT_SECONDS
+                )
+            
+            # Set up the response cache and its embedding client
+            self.embedding_client = self.openai_client
+            self.response_cache = SemanticResponseCache(embed_func=self._embed_text)
+            
+            # Add core plugins (imported here; only needed once the kernel exists)
+            from semantic_kernel.core_plugins import MathPlugin, TimePlugin
             self.kernel.add_plugin(MathPlugin(), plugin_name="math")
             self.kernel.add_plugin(TimePlugin(), plugin_name="time")
             
-            # Initialize business tools
-            await self._initialize_business_tools()
-            
-            # Add business tools as plugins
-            self.kernel.add_plugin(self.invoice_tools, plugin_name="invoice")
-            self.kernel.add_plugin(self.customer_tools, plugin_name="customer")
-            self.kernel.add_plugin(self.quote_tools, plugin_name="quote")
-            self.kernel.add_plugin(self.job_tools, plugin_name="job")
-            self.kernel.add_plugin(self.expense_tools, plugin_name="expense")
-            self.kernel.add_plugin(self.manual_task_tools, plugin_name="manual_task")
+            # Business tools are created on first use by their agent (_get_agent_tools)
             
             self._initialized = True
             self.logger.info("Semantic Kernel service initialized successfully")
@@ -90,288 +638,294 @@ class SemanticKernelService:
             self.logger.error(f"Failed to initialize Semantic Kernel service: {e}")
             raise
     
-    async def _initialize_business_tools(self) -> None:
-        """Initialize all business-specific tools"""
-        self.invoice_tools = InvoiceTools(self.settings)
-        self.customer_tools = CustomerTools(self.settings)
-        self.quote_tools = QuoteTools(self.settings)
-        self.job_tools = JobTools(self.settings)
-        self.expense_tools = ExpenseTools(self.settings)
-        self.manual_task_tools = ManualTaskTools(self.settings)
-        
-        # Initialize tools if they have async initialization
-        for tool in [self.invoice_tools, self.customer_tools, self.quote_tools, 
-                    self.job_tools, self.expense_tools, self.manual_task_tools]:
-            if hasattr(tool, 'initialize'):
-                await tool.initialize()
-    
-    def is_initialized(self) -> bool:
-        """Check if the service is properly initialized"""
-        return self._initialized and self.kernel is not None
-    
-    async def test_openai_connection(self) -> bool:
-        """Test the OpenAI connection"""
-        try:
-            if not self.chat_service:
-                return False
-            
-            # Simple test prompt
-            test_prompt = "Reply with just the word 'OK' if you can read this."
-            result = await self.chat_service.get_chat_message_content(
-                chat_history=[],
-                settings=sk.PromptExecutionSettings(),
-                prompt=test_prompt
-            )
-            
-            return "OK" in str(result).upper()
-            
-        except Exception as e:
-            self.logger.error(f"OpenAI connection test failed: {e}")
-            return False
-    
-    async def process_invoice_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    async def _get_agent_tools(self, agent_type: str) -> Any:
         """
-        Process invoice generation request using AI agent
+        Get the business tools of an agent, creating them on first use
+        
+        Tool modules are imported, initialized and registered as a kernel
+        plugin the first time their agent handles a request, so tools a
+        deployment never uses cost nothing.
         
         Args:
-            prompt: Natural language description of the invoice to generate
-            context: Optional context data (client_id, quote_id, etc.)
-            language: Response language (en/fr)
-            history: Previous conversation history
+            agent_type: Agent type (invoice, customer, quote, job, expense, manual_task)
         
         Returns:
-            Dictionary containing the generated invoice data or error information
+            Tool instance of the agent
         """
-        try:
-            self.logger.info(f"Processing invoice request: {prompt[:100]}...")
-            
-            # Create system prompt for invoice generation
-            system_prompt = self._get_invoice_system_prompt(language)
-            
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "invoice", language)
-            
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "invoice", history)
-            
-            return {
-                "success": True,
-                "message": "Invoice generated successfully" if language == "en" else "Facture générée avec succès",
-                "data": result
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Invoice processing failed: {e}")
-            return {
-                "success": False,
-                "message": f"Failed to generate invoice: {str(e)}",
-                "errors": [str(e)]
-            }
+        tools = self._tools.get(agent_type)
+        if tools is not None:
+            return tools
+        
+        attribute, module_name, class_name = self._AGENT_TOOLS[agent_type]
+        async with self._tools_locks[agent_type]:
+            tools = self._tools.get(agent_type)
+            if tools is None:
+                tool_class = getattr(importlib.import_module(module_name), class_name)
+                tools = tool_class(self.settings)
+                if hasattr(tools, 'initialize'):
+                    await tools.initialize()
+                self.kernel.add_plugin(tools, plugin_name=agent_type)
+                setattr(self, attribute, tools)
+                self._tools[agent_type] = tools
+                if hasattr(tools, 'cleanup'):
+                    self._cleanupable_tools.append(tools)
+                self.logger.info(f"Initialized {tool_class.__name__}")
+        
+        return tools
     
-    async def process_customer_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    async def preload_tools(self, agent_types: Optional[List[str]] = None) -> None:
         """
-        Process customer data extraction request using AI agent
+        Create and initialize business tools ahead of the first request
         
-        Args:
-            prompt: Natural language text containing customer information
-            context: Optional context data
-            language: Response language (en/fr)
-            history: Previous conversation history
+        Tool initializations are independent, so they run concurrently and
+        warm-up takes as long as the slowest tool.
         
-        Returns:
-            Dictionary containing extracted customer data or error information
+        Args:
+            agent_types: Agents whose tools to load (all agents if None)
         """
-        try:
-            self.logger.info(f"Processing customer request: {prompt[:100]}...")
-            
-            # Create system prompt for customer extraction
-            system_prompt = self._get_customer_system_prompt(language)
-            
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "customer", language)
-            
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "customer", history)
-            
-            return {
-                "success": True,
-                "message": "Customer data extracted successfully" if language == "en" else "Données client extraites avec succès",
-                "data": result
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Customer processing failed: {e}")
-            return {
-                "success": False,
-                "message": f"Failed to extract customer data: {str(e)}",
-                "errors": [str(e)]
-            }
+        agent_types = list(self._AGENT_TOOLS) if agent_types is None else agent_types
+        results = await asyncio.gather(
+            *(self._get_agent_tools(agent_type) for agent_type in agent_types),
+            return_exceptions=True
+        )
+        
+        errors = []
+        for agent_type, result in zip(agent_types, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to initialize {agent_type} tools: {result}")
+                errors.append(result)
+        
+        if errors:
+            raise errors[0]
     
-    async def process_quote_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    async def process(
+        self,
+        agent_type: str,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        language: str = "en",
+        history: List[Dict] = None,
+        session_id: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
-        Process quote generation request using AI agent
+        Process a request with the given AI agent
         
         Args:
-            prompt: Natural language description of the quote to generate
-            context: Optional context data (client_id, etc.)
+            agent_type: Agent to use (invoice, customer, quote, job, expense, manual_task)
+            prompt: Natural language request
+            context: Optional context data (client_id, quote_id, etc.)
             language: Response language (en/fr)
             history: Previous conversation history
+            session_id: Conversation identifier; lets the converted history be reused across turns
+            system_prompt: Static instructions replacing the agent's system prompt
+                (e.g. intent detection); kept as the first message so OpenAI can
+                reuse its cached prefix across requests; such requests are never
+                served from the response cache
+            json_schema: OpenAI structured output definition ({"name", "schema", "strict"})
+                the response must follow; only enforced when structured outputs are
+                enabled in settings, JSON mode applies otherwise
         
         Returns:
-            Dictionary containing the generated quote data or error information
+            Dictionary containing the agent result or error information
         """
+        agent = self._AGENTS.get(agent_type)
+        if agent is None:
+            raise ValueError(f"Unknown agent type: {agent_type}")
+        
+        success_messages, action = agent
+        label = agent_type.replace("_", " ")
+        
         try:
-            self.logger.info(f"Processing quote request: {prompt[:100]}...")
+            self.logger.info("Processing %s request: %.100s...", label, prompt)
+            
+            await self._get_agent_tools(agent_type)
             
-            # Create system prompt for quote generation
-            system_prompt = self._get_quote_system_prompt(language)
+            # Create system prompt for the agent
+            uses_agent_prompt = system_prompt is None
+            if uses_agent_prompt:
+                system_prompt = self._get_system_prompt(agent_type, language)
             
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "quote", language)
+            # Prepare the full prompt
+            full_prompt = self._prepare_prompt_with_context(prompt, context, agent_type, language)
             
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "quote", history)
+            # Constrain the response to the schema when the model supports it
+            settings_overrides = {}
+            if json_schema is not None and self.settings.openai_structured_outputs:
+                settings_overrides["response_format"] = {"type": "json_schema", "json_schema": json_schema}
+            
+            # Execute with Semantic Kernel; overridden prompts (e.g. intent detection
+            # with extraction) may return user data, so they bypass the response cache
+            result = await self._execute_agent_request(
+                system_prompt, full_prompt, agent_type, history,
+                context=context, cache_prompt=prompt if uses_agent_prompt else None,
+                session_id=session_id,
+                **settings_overrides
+            )
             
             return {
                 "success": True,
-                "message": "Quote generated successfully" if language == "en" else "Devis généré avec succès",
+                "message": success_messages["en"] if language == "en" else success_messages["fr"],
                 "data": result
             }
             
         except Exception as e:
-            self.logger.error(f"Quote processing failed: {e}")
+            self.logger.error("%s processing failed: %s", label.capitalize(), e)
             return {
                 "success": False,
-                "message": f"Failed to generate quote: {str(e)}",
+                "message": f"Failed to {action}: {str(e)}",
                 "errors": [str(e)]
             }
     
-    async def process_job_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    # Per-agent entry points kept for existing callers
+    process_invoice_request = functools.partialmethod(process, "invoice")
+    process_customer_request = functools.partialmethod(process, "customer")
+    process_quote_request = functools.partialmethod(process, "quote")
+    process_job_request = functools.partialmethod(process, "job")
+    process_expense_request = functools.partialmethod(process, "expense")
+    process_manual_task_request = functools.partialmethod(process, "manual_task")
+    
+    async def process_batch(self, requests: List[Tuple[str, str, Optional[Dict[str, Any]], str]]) -> List[Dict[str, Any]]:
         """
-        Process job scheduling request using AI agent
+        Process several independent agent requests concurrently
         
         Args:
-            prompt: Natural language description of the job to schedule
-            context: Optional context data (client_id, etc.)
-            language: Response language (en/fr)
-            history: Previous conversation history
+            requests: List of (agent_type, prompt, context, language) tuples,
+                e.g. invoice + expense + customer extraction for one receipt
         
         Returns:
-            Dictionary containing the scheduled job data or error information
+            List of results in the same order as the requests
         """
-        try:
-            self.logger.info(f"Processing job request: {prompt[:100]}...")
-            
-            # Create system prompt for job scheduling
-            system_prompt = self._get_job_system_prompt(language)
-            
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "job", language)
-            
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "job", history)
-            
-            return {
-                "success": True,
-                "message": "Job scheduled successfully" if language == "en" else "Travail programmé avec succès",
-                "data": result
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Job processing failed: {e}")
-            return {
+        results = await asyncio.gather(
+            *(self.process(*request) for request in requests),
+            return_exceptions=True
+        )
+        
+        return [
+            {
                 "success": False,
-                "message": f"Failed to schedule job: {str(e)}",
-                "errors": [str(e)]
-            }
+                "message": f"Failed to process request: {str(result)}",
+                "errors": [str(result)]
+            } if isinstance(result, Exception) else result
+            for result in results
+        ]
     
-    async def process_expense_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    async def process_stream(
+        self,
+        agent_type: str,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        language: str = "en",
+        history: List[Dict] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
         """
-        Process expense tracking request using AI agent
+        Stream the raw response of an AI agent as it is generated
+        
+        Unlike process(), the response is neither parsed nor cached; callers
+        get the text chunks as soon as the model emits them.
         
         Args:
-            prompt: Natural language description of the expense or receipt text
-            context: Optional context data (receipt_text, etc.)
+            agent_type: Agent to use (invoice, customer, quote, job, expense, manual_task)
+            prompt: Natural language request
+            context: Optional context data (client_id, quote_id, etc.)
             language: Response language (en/fr)
             history: Previous conversation history
+            session_id: Conversation identifier; lets the converted history be reused across turns
         
-        Returns:
-            Dictionary containing the processed expense data or error information
+        Yields:
+            Text chunks of the agent response
         """
-        try:
-            self.logger.info(f"Processing expense request: {prompt[:100]}...")
-            
-            # Create system prompt for expense tracking
-            system_prompt = self._get_expense_system_prompt(language)
-            
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "expense", language)
-            
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "expense", history)
-            
-            return {
-                "success": True,
-                "message": "Expense tracked successfully" if language == "en" else "Dépense enregistrée avec succès",
-                "data": result
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Expense processing failed: {e}")
-            return {
-                "success": False,
-                "message": f"Failed to track expense: {str(e)}",
-                "errors": [str(e)]
-            }
+        if not self.is_initialized():
+            raise RuntimeError("Semantic Kernel service is not initialized")
+        
+        agent = self._AGENTS.get(agent_type)
+        if agent is None:
+            raise ValueError(f"Unknown agent type: {agent_type}")
+        
+        await self._get_agent_tools(agent_type)
+        
+        system_prompt = self._get_system_prompt(agent_type, language)
+        full_prompt = self._prepare_prompt_with_context(prompt, context, agent_type, language)
+        
+        async for chunk in self._stream_agent_response(system_prompt, full_prompt, history, session_id):
+            yield chunk
     
-    async def process_manual_task_request(self, prompt: str, context: Optional[Dict[str, Any]] = None, language: str = "en", history: List[Dict] = None) -> Dict[str, Any]:
+    async def process_stream_json(
+        self,
+        agent_type: str,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        language: str = "en",
+        history: List[Dict] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Any]:
         """
-        Process manual task creation request using AI agent
+        Stream the agent response as progressively completed JSON
+        
+        Each yielded value is the response parsed so far (e.g. a dict with
+        its first fields), so voice callers can act before the response is
+        complete. The last value is the fully parsed response. Without the
+        partial-json-parser package only the final value is yielded.
         
         Args:
-            prompt: Natural language description of the manual task
-            context: Optional context data (task details, etc.)
+            agent_type: Agent to use (invoice, customer, quote, job, expense, manual_task)
+            prompt: Natural language request
+            context: Optional context data (client_id, quote_id, etc.)
             language: Response language (en/fr)
             history: Previous conversation history
+            session_id: Conversation identifier; lets the converted history be reused across turns
         
-        Returns:
-            Dictionary containing the processed manual task data or error information
+        Yields:
+            Partially parsed responses, then the complete parsed response
         """
-        try:
-            self.logger.info(f"Processing manual task request: {prompt[:100]}...")
-            
-            # Create system prompt for manual task creation
-            system_prompt = self._get_manual_task_system_prompt(language)
-            
-            # Prepare the full prompt with context
-            full_prompt = self._prepare_prompt_with_context(prompt, context, "manual_task", language)
+        chunks: List[str] = []
+        last_parsed = None
+        
+        async for chunk in self.process_stream(agent_type, prompt, context, language, history, session_id):
+            chunks.append(chunk)
             
-            # Execute with Semantic Kernel
-            result = await self._execute_agent_request(system_prompt, full_prompt, "manual_task", history)
+            # Re-parse only when a value may have been completed
+            if not partial_json_available or not any(char in chunk for char in self._JSON_VALUE_ENDINGS):
+                continue
             
-            return {
-                "success": True,
-                "message": "Manual task created successfully" if language == "en" else "Tâche manuelle créée avec succès",
-                "data": result
-            }
+            try:
+                parsed = partial_json_loads("".join(chunks))
+            except Exception:
+                continue
             
-        except Exception as e:
-            self.logger.error(f"Manual task processing failed: {e}")
-            return {
-                "success": False,
-                "message": f"Failed to create manual task: {str(e)}",
-                "errors": [str(e)]
-            }
+            if parsed != last_parsed:
+                last_parsed = parsed
+                yield parsed
+        
+        final = self._parse_response("".join(chunks))
+        if final != last_parsed:
+            yield final
     
-    async def _execute_agent_request(self, system_prompt: str, user_prompt: str, agent_type: str, chat_history_list: List[Dict] = None) -> Dict[str, Any]:
+    async def _execute_agent_request(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        agent_type: str,
+        chat_history_list: List[Dict] = None,
+        context: Optional[Dict[str, Any]] = None,
+        cache_prompt: Optional[str] = None,
+        session_id: Optional[str] = None,
+        **settings_overrides: Any
+    ) -> Dict[str, Any]:
         """
         Execute an agent request using Semantic Kernel
         
         Args:
             system_prompt: System instructions for the AI
-            user_prompt: User's request with context
+            user_prompt: User's request with current time and context
             agent_type: Type of agent (invoice, customer, quote, job, expense)
             chat_history_list: Previous conversation history as list of {"role": "user/assistant", "content": "..."}
+            context: Request context (already in user_prompt); part of the response cache key
+            cache_prompt: Raw user request used as response cache key (no caching if None)
+            session_id: Conversation identifier for the session history cache
+            settings_overrides: Optional execution setting overrides (e.g. max_tokens)
         
         Returns:
             Parsed result from the AI agent
@@ -379,459 +933,513 @@ class SemanticKernelService:
         if not self.is_initialized():
             raise RuntimeError("Semantic Kernel service is not initialized")
         
-        # Create chat history
-        chat_history = ChatHistory()
-        chat_history.add_system_message(system_prompt)
+        # Serve repeated or near-duplicate requests from the response cache
+        cache_namespace = None
+        cache_embedding = None
+        if self._is_cacheable_request(cache_prompt, context, chat_history_list, settings_overrides):
+            cache_namespace = SemanticResponseCache.make_namespace(
+                self.settings.openai_model,
+                agent_type,
+                system_prompt,
+                self._get_business_context(),
+                orjson.dumps(context or {}, option=orjson.OPT_SORT_KEYS),
+                datetime.now().strftime("%Y-%m-%d")
+            )
+            cached_result, cache_embedding = await self.response_cache.lookup(cache_namespace, cache_prompt)
+            if cached_result is not None:
+                return cached_result
+        
+        # Stream the completion and accumulate the chunks
+        chunks = [
+            chunk async for chunk in self._stream_agent_response(
+                system_prompt, user_prompt, chat_history_list, session_id, **settings_overrides
+            )
+        ]
+        
+        # Parse the result; large responses are parsed off the event loop
+        response_text = "".join(chunks)
+        if len(response_text) > self.THREAD_PARSE_THRESHOLD:
+            parsed_result = await asyncio.to_thread(self._parse_response, response_text)
+        else:
+            parsed_result = self._parse_response(response_text)
+        
+        if cache_namespace is not None:
+            self.response_cache.store(cache_namespace, cache_prompt, parsed_result, cache_embedding)
+        
+        return parsed_result
+    
+    async def _stream_agent_response(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        chat_history_list: Optional[List[Dict]] = None,
+        session_id: Optional[str] = None,
+        **settings_overrides: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream the text of an agent response as it is generated
         
-        # Add previous conversation history if provided
-        if chat_history_list:
-            for msg in chat_history_list:
-                if msg["role"] == "user":
-                    chat_history.add_user_message(msg["content"])
-                elif msg["role"] == "assistant":
-                    chat_history.add_assistant_message(msg["content"])
+        Args:
+            system_prompt: System instructions for the AI
+            user_prompt: User's request with current time and context
+            chat_history_list: Previous conversation history
+            session_id: Conversation identifier for the session history cache
+            settings_overrides: Optional execution setting overrides (e.g. max_tokens)
         
+        Yields:
+            Text chunks of the response
+        """
+        # Create chat history from the (possibly cached) conversation prefix
+        chat_history = ChatHistory(messages=list(self._get_base_history(system_prompt, chat_history_list, session_id).messages))
         chat_history.add_user_message(user_prompt)
         
-        # Configure execution settings
-        execution_settings = OpenAIChatPromptExecutionSettings(
-            service_id="chat_completion",
-            ai_model_id=self.settings.openai_model,
-            max_tokens=2000,
-            temperature=0.1,  # Low temperature for consistent results
-            top_p=0.9
-        )
+        # Shrink the output budget when the prompt leaves less room than usual
+        max_tokens = self._get_max_output_tokens(system_prompt, user_prompt, chat_history_list)
+        if max_tokens < self.MAX_OUTPUT_TOKENS:
+            settings_overrides.setdefault("max_tokens", max_tokens)
         
-        # Execute the request
-        result = await self.chat_service.get_chat_message_content(
-            chat_history=chat_history,
-            settings=execution_settings
-        )
+        # Reuse the shared execution settings, copying only when overridden
+        execution_settings = self._execution_settings
+        if settings_overrides:
+            execution_settings = execution_settings.model_copy(update=settings_overrides)
+        
+        # Execute the request; the semaphore caps in-flight OpenAI calls across all sessions
+        async with self._inflight_sem:
+            async for message in self.chat_service.get_streaming_chat_message_content(
+                chat_history=chat_history,
+                settings=execution_settings,
+                kernel=self.kernel
+            ):
+                # Read the parsed content field instead of re-rendering the message
+                if message is not None and message.content:
+                    yield message.content
+    
+    def _get_base_history(
+        self,
+        system_prompt: str,
+        chat_history_list: Optional[List[Dict]],
+        session_id: Optional[str]
+    ) -> ChatHistory:
+        """
+        Get the chat history prefix (instructions + previous turns) of a request
+        
+        Static instructions and company settings come first so the prompt
+        prefix is byte-identical across calls (OpenAI prompt caching). With a
+        session_id, the converted prefix is kept between turns and only the
+        messages added to chat_history_list since the last call are appended.
+        
+        Args:
+            system_prompt: System instructions for the AI
+            chat_history_list: Previous conversation history
+            session_id: Conversation identifier (no caching if None)
+        
+        Returns:
+            ChatHistory to copy and extend with the user message (do not mutate)
+        """
+        chat_history_list = chat_history_list or []
+        now = time.monotonic()
+        
+        entry = self._histories.get(session_id) if session_id is not None else None
+        if entry is not None and self._is_history_prefix(entry, system_prompt, chat_history_list, now):
+            base_history, synced = entry[1], entry[2]
+        else:
+            base_history, synced = ChatHistory(), 0
+            base_history.add_system_message(system_prompt)
+            base_history.add_system_message(self._get_business_context())
+        
+        # Add previous conversation history not converted yet
+        for msg in chat_history_list[synced:]:
+            if msg["role"] == "user":
+                base_history.add_user_message(msg["content"])
+            elif msg["role"] == "assistant":
+                base_history.add_assistant_message(msg["content"])
+        
+        if session_id is not None:
+            last_message = chat_history_list[-1] if chat_history_list else None
+            self._histories[session_id] = (system_prompt, base_history, len(chat_history_list), last_message, now)
+            self._histories.move_to_end(session_id)
+            while len(self._histories) > self.MAX_SESSION_HISTORIES:
+                self._histories.popitem(last=False)
         
-        # Parse the result
-        response_text = str(result)
+        return base_history
+    
+    def _is_history_prefix(
+        self,
+        entry: Tuple[str, ChatHistory, int, Optional[Dict], float],
+        system_prompt: str,
+        chat_history_list: List[Dict],
+        now: float
+    ) -> bool:
+        """Check that a cached session history is still a prefix of the conversation"""
+        cached_prompt, _, synced, last_message, last_used = entry
+        if cached_prompt != system_prompt or now - last_used > self.SESSION_HISTORY_TTL_SECONDS:
+            return False
+        if synced > len(chat_history_list):
+            return False
+        # A reset conversation may have grown back to the same length
+        return synced == 0 or chat_history_list[synced - 1] == last_message
+    
+    def _load_encoding(self):
+        """Get the tiktoken encoding of the configured model, if available"""
+        if not tiktoken_available:
+            self.logger.warning("tiktoken not installed, max_tokens will not be adjusted to prompt size")
+            return None
         
         try:
-            # Try to parse as JSON first
-            parsed_result = json.loads(response_text)
-            return parsed_result
-        except json.JSONDecodeError:
-            # If not JSON, return as text
-            return {"response": response_text}
-    
-    def _prepare_prompt_with_context(self, prompt: str, context: Optional[Dict[str, Any]], agent_type: str, language: str) -> str:
-        """Prepare the full prompt with context information"""
-        
-        context_info = ""
-        if context:
-            context_info = f"\\nContext: {json.dumps(context, indent=2)}"
-        
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        language_note = ""
-        if language == "fr":
-            language_note = "\\nRéponds en français."
-        
-        full_prompt = f"""
-Current time: {current_time}
-Company: {self.settings.company_name}
-Default VAT rate: {self.settings.default_vat_rate}%
-Default currency: {self.settings.default_currency}
-{context_info}
-
-User request: {prompt}
-{language_note}
-"""
+            return tiktoken.encoding_for_model(self.settings.openai_model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count the tokens of a text with the model encoding"""
+        return len(self._enc.encode(text, disallowed_special=()))
+    
+    def _get_max_output_tokens(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        chat_history_list: Optional[List[Dict]]
+    ) -> int:
+        """
+        Get the output token budget left by a prompt
+        
+        Counts are memoized per text, so a turn only tokenizes its new
+        user message. Models with an unknown context window get
+        MAX_OUTPUT_TOKENS without a check.
+        
+        Args:
+            system_prompt: System instructions for the AI
+            user_prompt: User's request
+            chat_history_list: Previous conversation history
+        
+        Returns:
+            max_tokens to request from the model
+        
+        Raises:
+            ValueError: If the prompt does not fit the model context window
+        """
+        if self._enc is None or self._context_limit is None:
+            return self.MAX_OUTPUT_TOKENS
         
-        return full_prompt.strip()
+        count = self._cached_token_count
+        input_tokens = count(system_prompt) + count(self._get_business_context()) + self._count_tokens(user_prompt)
+        for msg in chat_history_list or []:
+            input_tokens += count(msg["content"])
+        
+        max_tokens = min(self.MAX_OUTPUT_TOKENS, self._context_limit - input_tokens - self.TOKEN_SAFETY_MARGIN)
+        if max_tokens <= 0:
+            raise ValueError(
+                f"Request is too long ({input_tokens} tokens) for the {self._context_limit}-token context window"
+            )
+        
+        return max_tokens
     
-    def _get_invoice_system_prompt(self, language: str) -> str:
-        """Get system prompt for invoice generation agent"""
-        if language == "fr":
-            return """Tu es un assistant IA spécialisé dans la génération complète de factures pour Devia.
-
-RÔLE: Analyser les demandes vocales et générer des données de facture structurées avec support complet.
-
-FONCTIONS DISPONIBLES:
-- invoice.create_invoice: Créer une facture avec extraction complète des champs
-- invoice.update_invoice: Mettre à jour une facture avec support de tous les champs
-- invoice.delete_invoice: Supprimer une facture
-- invoice.calculate_invoice_totals: Calculer les totaux (TVA, remises, acomptes)
-- invoice.generate_invoice_number: Générer un numéro de facture unique
-- invoice.get_invoices: Lister les factures
-- invoice.get_invoice_by_id: Récupérer une facture par ID
-- customer.extract_customer_data: Extraire les données client
-
-CHAMPS COMPLETS DE FACTURE SUPPORTÉS:
-- Informations Client: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
-- Détails Projet: title, projectName, projectAddress, projectStreetAddress, projectZipCode, projectCity
-- Types Facture: invoiceType (FINAL/INTERIM/ADVANCE/CREDIT)
-- Système Remise: montant, discountType (FIXED/PERCENTAGE)
-- Système Acompte: montant, downPaymentType (FIXED/PERCENTAGE)
-- Notes Multiples: notes (générales), internalNotes (privées), publicNotes (client)
-- Signatures: contractorSignature, clientSignature
-
-INSTRUCTIONS OPTIMISÉES VOIX:
-1. Traiter le texte transcrit vocal pouvant contenir des artefacts de reconnaissance.
-2. Extraire informations client et projet depuis input conversationnel.
-3. Identifier type facture depuis patterns vocaux ("facture finale", "acompte", "facture intermédiaire").
-4. Analyser nombres et pourcentages parlés pour remises et acomptes.
-5. Distinguer types de notes depuis contexte conversationnel.
-6. Gérer patterns de parole informels en maintenant précision.
-7. Lors d'appels get_*, TOUJOURS inclure user_id depuis contexte.
-8. Retourner JSON structuré optimisé pour réponse vocale.
-
-TOUJOURS retourner JSON valide avec structure facture améliorée."""
-        else:
-            return """You are an AI assistant specialized in comprehensive invoice generation for Devia.
-
-ROLE: Analyze natural language requests and generate structured invoice data with full field support.
-
-AVAILABLE FUNCTIONS:
-- invoice.create_invoice: Create an invoice from natural language description with comprehensive field extraction
-- invoice.update_invoice: Update an existing invoice with all field support
-- invoice.delete_invoice: Delete an invoice
-- invoice.calculate_invoice_totals: Calculate totals (VAT, discounts, down payments)
-- invoice.generate_invoice_number: Generate unique invoice number
-- invoice.get_invoices: List invoices
-- invoice.get_invoice_by_id: Get invoice by ID
-- customer.extract_customer_data: Extract customer data from text
-
-COMPREHENSIVE INVOICE FIELDS SUPPORTED:
-- Client Information: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
-- Project Details: title, projectName, projectAddress, projectStreetAddress, projectZipCode, projectCity
-- Invoice Types: invoiceType (FINAL/INTERIM/ADVANCE/CREDIT)
-- Discount System: discount amount, discountType (FIXED/PERCENTAGE)
-- Down Payment System: downPayment amount, downPaymentType (FIXED/PERCENTAGE)
-- Multiple Notes: notes (general), internalNotes (private), publicNotes (client-visible)
-- Digital Signatures: contractorSignature, clientSignature (base64 encoded)
-- Enhanced Fields: quoteId (for quote conversion), userId
-
-VOICE-OPTIMIZED INSTRUCTIONS:
-1. Process voice-transcribed text that may have speech-to-text artifacts.
-2. Extract comprehensive client and project information from conversational input.
-3. Identify invoice type from natural speech patterns ("final bill", "down payment", "interim invoice").
-4. Parse spoken numbers and percentages for discounts and down payments.
-5. Distinguish between different note types from conversational context.
-6. Handle informal speech patterns while maintaining data accuracy.
-7. When calling get_* functions, ALWAYS include the user_id parameter from context.
-8. Return structured data as JSON optimized for voice response formatting.
-
-ALWAYS return valid JSON with the enhanced invoice structure supporting all new fields."""
+    @staticmethod
+    def _parse_response(response_text: str) -> Any:
+        """
+        Parse the AI response as JSON when it looks like JSON
+        
+        Markdown code fences (```json ... ```) are stripped first. Plain-text
+        responses skip the parse entirely instead of raising and catching a
+        decode error.
+        
+        Args:
+            response_text: Raw response text from the model
+        
+        Returns:
+            Parsed JSON value, or {"response": response_text} for text responses
+        """
+        text = response_text.strip()
+        if text.startswith("```"):
+            text = text[3:]
+            if text.startswith("json"):
+                text = text[4:]
+            if text.endswith("```"):
+                text = text[:-3]
+            text = text.strip()
+        
+        if text and (text[0], text[-1]) in (("{", "}"), ("[", "]")):
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+        
+        return {"response": response_text}
     
-    def _get_customer_system_prompt(self, language: str) -> str:
-        """Get system prompt for customer data extraction agent"""
-        if language == "fr":
-            return """Tu es un assistant IA spécialisé dans l'extraction et la gestion des données client pour Devia.
-
-RÔLE: Analyser du texte en langage naturel pour extraire des informations client structurées.
-
-FONCTIONS DISPONIBLES:
-- customer.extract_customer_data: Extraire les données client du texte
-- customer.validate_customer_info: Valider les informations client
-- customer.format_address: Formater l'adresse
-- customer.generate_customer_id: Générer un ID client unique
-
-INSTRUCTIONS:
-1. Analyser le texte pour identifier les informations client
-2. Extraire nom, email, téléphone, adresse, entreprise
-3. Valider et formater les données
-4. Générer un ID unique si nécessaire
-5. Retourner les données structurées en JSON
-
-TOUJOURS retourner un JSON valide avec la structure client."""
-        else:
-            return """You are an AI assistant specialized in customer data extraction and management for Devia.
-
-ROLE: Analyze natural language text to extract structured customer information.
+    def _is_cacheable_request(
+        self,
+        prompt: Optional[str],
+        context: Optional[Dict[str, Any]],
+        chat_history_list: Optional[List[Dict]],
+        settings_overrides: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Check whether a request may be answered from the response cache
+        
+        Multi-turn requests, requests whose context carries session-specific
+        identifiers (user_id, client_id, ...) and sampled (non-deterministic)
+        requests are never cached.
+        """
+        if self.response_cache is None or not prompt or chat_history_list:
+            return False
+        
+        temperature = (settings_overrides or {}).get("temperature", self._execution_settings.temperature)
+        if temperature is None or temperature > self.CACHE_MAX_TEMPERATURE:
+            return False
+        
+        if self._has_context_ids(context):
+            return False
+        
+        return True
+    
+    @staticmethod
+    def _has_context_ids(context: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a request context carries identifiers (user_id, client_id, ...)"""
+        return bool(context) and any(key == "id" or key.endswith("_id") for key in context)
+    
+    async def _embed_text(self, text: str) -> List[float]:
+        """Get the embedding of a text for the semantic response cache"""
+        response = await self.embedding_client.embeddings.create(
+            model=self.CACHE_EMBEDDING_MODEL,
+            input=text
+        )
+        return response.data[0].embedding
+    
+    def _get_business_context(self) -> str:
+        """Get the static company settings sent to the AI as a system message"""
+        return self._business_context
+    
+    def _get_current_time(self) -> str:
+        """
+        Get the current time rounded down to the minute
+        
+        Seconds are meaningless to the AI and would make every prompt unique,
+        so the formatted value is reused until the next minute starts.
+        """
+        if time.time() >= self._current_time_expiry:
+            current_minute = datetime.now().replace(second=0, microsecond=0)
+            self._current_time = current_minute.strftime("%Y-%m-%d %H:%M")
+            self._current_time_expiry = (current_minute + timedelta(minutes=1)).timestamp()
+        return self._current_time
+    
+    def _prepare_prompt_with_context(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        agent_type: str,
+        language: str
+    ) -> str:
+        """
+        Prepare the user message with per-request context information
+        
+        Volatile values (current time, context) are placed after the user
+        request; static company settings are sent separately as a system
+        message, so the system prompt prefix stays cacheable.
+        """
+        
+        fields = {
+            "prompt": prompt,
+            "current_time": self._get_current_time(),
+            "context_info": f"\nContext: {orjson.dumps(context).decode()}" if context else "",
+            "language_note": self._LANGUAGE_NOTES.get(language, "")
+        }
+        
+        return self._USER_PROMPT_TEMPLATE.format_map(fields).strip()
+    
+    def _get_system_prompt(self, agent_type: str, language: str) -> str:
+        """
+        Get the system prompt of an agent
+        
+        Prompts are module-level constants, so this is a dict lookup and the
+        returned string is byte-identical across requests.
+        """
+        prompts = _SYSTEM_PROMPTS[agent_type]
+        prompt = prompts.get(language)
+        if prompt is None:
+            if agent_type == "manual_task":
+                return _MANUAL_TASK_SYSTEM_PROMPT_TEMPLATE.format(language=language)
+            prompt = prompts["en"]
+        return prompt
 
-AVAILABLE FUNCTIONS:
-- customer.extract_customer_data: Extract customer data from text
-- customer.validate_customer_info: Validate customer information
-- customer.format_address: Format address information
-- customer.generate_customer_id: Generate unique customer ID
+    def _get_invoice_system_prompt(self, language: str) -> str:
+        """Get system prompt for invoice generation agent"""
+        return self._get_system_prompt("invoice", language)
 
-INSTRUCTIONS:
-1. Analyze text to identify customer information
-2. Extract name, email, phone, address, company
-3. Validate and format the data
-4. Generate unique ID if needed
-5. Return structured data as JSON
+    def _get_customer_system_prompt(self, language: str) -> str:
+        """Get system prompt for customer data extraction agent"""
+        return self._get_system_prompt("customer", language)
 
-ALWAYS return valid JSON with customer structure."""
-    
     def _get_quote_system_prompt(self, language: str) -> str:
         """Get system prompt for quote generation agent"""
-        if language == "fr":
-            return """Tu es un assistant IA spécialisé dans la génération complète de devis pour Devia.
-
-RÔLE: Analyser les demandes en langage naturel et générer des données de devis structurées avec support complet des champs.
-
-FONCTIONS DISPONIBLES:
-- quote.create_quote: Créer un devis avec extraction complète des champs
-- quote.update_quote: Mettre à jour un devis avec support de tous les champs
-- quote.delete_quote: Supprimer un devis
-- quote.calculate_quote_totals: Calculer les totaux (TVA, remises, acomptes)
-- quote.get_quotes: Lister les devis
-- quote.get_quote_by_id: Récupérer un devis par ID
-
-CHAMPS COMPLETS DE DEVIS SUPPORTÉS:
-- Informations Client: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
-- Détails Projet: title, projectName, projectStreetAddress, projectZipCode, projectCity
-- Système Remise: montant, discountType (FIXED/PERCENTAGE)
-- Système Acompte: montant, downPaymentType (FIXED/PERCENTAGE)
-- Notes Multiples: internalNotes (privées), publicNotes (visibles client)
-- Signatures: contractorSignature, clientSignature
-- Validité: validUntil (date d'expiration du devis)
-
-INSTRUCTIONS:
-1. Analyser la demande pour identifier tous les éléments projet et client.
-2. Extraire informations client complètes incluant type d'entreprise.
-3. Identifier détails projet (nom, adresse complète incluant code postal et ville).
-4. Analyser informations de remise incluant type (pourcentage vs montant fixe).
-5. Extraire détails d'acompte si mentionnés (pourcentage ou montant fixe).
-6. Catégoriser notes en internes (privées) ou publiques (visibles client).
-7. Calculer totaux en considérant remises, acomptes, et TVA.
-8. Lors d'appels get_*, TOUJOURS inclure user_id depuis contexte.
-9. Retourner données structurées en JSON, prêtes pour l'API complète.
-
-TOUJOURS retourner un JSON valide avec structure devis améliorée supportant tous nouveaux champs."""
-        else:
-            return """You are an AI assistant specialized in comprehensive quote generation for Devia.
-
-ROLE: Analyze natural language requests and generate structured quote data with full field support.
-
-AVAILABLE FUNCTIONS:
-- quote.create_quote: Create a quote from natural language description with comprehensive field extraction
-- quote.update_quote: Update an existing quote with all field support
-- quote.delete_quote: Delete a quote
-- quote.calculate_quote_totals: Calculate totals (VAT, discounts, down payments)
-- quote.get_quotes: List quotes
-- quote.get_quote_by_id: Get quote by ID
-
-COMPREHENSIVE QUOTE FIELDS SUPPORTED:
-- Client Information: clientName, clientEmail, clientCompanyType (COMPANY/INDIVIDUAL)
-- Project Details: title, projectName, projectStreetAddress, projectZipCode, projectCity
-- Discount System: discount amount, discountType (FIXED/PERCENTAGE)
-- Down Payment System: downPayment amount, downPaymentType (FIXED/PERCENTAGE)
-- Multiple Notes: internalNotes (private), publicNotes (client-visible)
-- Digital Signatures: contractorSignature, clientSignature
-- Validity: validUntil (quote expiration date)
-
-INSTRUCTIONS:
-1. Analyze the request to identify all project and client elements.
-2. Extract comprehensive client information including company type (individual vs company).
-3. Identify project details (name, full address components including ZIP and city).
-4. Parse discount information including type (percentage vs fixed amount).
-5. Extract down payment details if mentioned (percentage or fixed amount).
-6. Categorize notes into internal (private) or public (client-visible).
-7. Calculate totals considering discounts, down payments, and VAT.
-8. When calling get_* functions, ALWAYS include user_id parameter from context.
-9. Return structured data as JSON, ready for the comprehensive API.
+        return self._get_system_prompt("quote", language)
 
-ALWAYS return valid JSON with the enhanced quote structure supporting all new fields."""
-    
     def _get_job_system_prompt(self, language: str) -> str:
         """Get system prompt for job scheduling agent"""
-        if language == "fr":
-            return """Tu es un assistant IA spécialisé dans la gestion complète de calendrier et d'affaires pour Devia.
-
-RÔLE: Analyser les demandes en langage naturel et gérer jobs, réunions, clients, dépenses, factures et devis.
-
-FONCTIONS DISPONIBLES:
-DATA RETRIEVAL (retourne données réelles de la base):
-- job.get_jobs: Récupérer la liste des jobs
-- job.get_meetings: Récupérer les réunions
-- job.get_clients: Récupérer les clients
-- job.get_expenses: Récupérer les dépenses
-- job.get_invoices: Récupérer les factures
-- job.get_quotes: Récupérer les devis
-
-API OPERATIONS (retourne structures d'appel API):
-- job.create_job_api_call: Créer un job
-- job.update_job_api_call: Modifier un job
-- job.delete_job_api_call: Supprimer un job
-- job.create_meeting_api_call: Créer une réunion
-- job.update_meeting_api_call: Modifier une réunion
-- job.delete_meeting_api_call: Supprimer une réunion
-
-LEGACY FUNCTIONS (toujours disponibles):
-- job.create_job_from_text: Créer un travail à partir du texte
-- job.parse_schedule_info: Analyser les informations de planification
-- job.validate_schedule: Valider le planning
-- job.suggest_optimal_times: Suggérer des créneaux optimaux
-- job.reschedule_job: Replanifier un travail existant
-- time.get_current_time: Obtenir l'heure actuelle
-
-INSTRUCTIONS:
-1. Pour CONSULTER des données, utiliser les fonctions get_* (retournent données réelles).
-2. Pour CRÉER/MODIFIER/SUPPRIMER, utiliser les fonctions *_api_call (retournent structure API).
-3. Utiliser les fonctions legacy pour analyse et suggestions.
-4. Analyser et convertir les expressions temporelles en dates.
-5. Retourner les données exactement comme reçues des fonctions.
-
-TOUJOURS retourner un JSON valide avec la structure appropriée."""
-        else:
-            return """You are an AI assistant specialized in comprehensive calendar and business management for Devia.
-
-ROLE: Analyze natural language requests and manage jobs, meetings, clients, expenses, invoices, and quotes.
-
-AVAILABLE FUNCTIONS:
-DATA RETRIEVAL (returns real database data):
-- job.get_jobs: Retrieve jobs list
-- job.get_meetings: Retrieve meetings
-- job.get_clients: Retrieve clients
-- job.get_expenses: Retrieve expenses
-- job.get_invoices: Retrieve invoices
-- job.get_quotes: Retrieve quotes
-
-API OPERATIONS (returns API call structures):
-- job.create_job_api_call: Create a job
-- job.update_job_api_call: Update a job
-- job.delete_job_api_call: Delete a job
-- job.create_meeting_api_call: Create a meeting
-- job.update_meeting_api_call: Update a meeting
-- job.delete_meeting_api_call: Delete a meeting
-
-LEGACY FUNCTIONS (still available):
-- job.create_job_from_text: Create job from text description
-- job.parse_schedule_info: Parse scheduling information
-- job.validate_schedule: Validate schedule feasibility
-- job.suggest_optimal_times: Suggest optimal time slots
-- job.reschedule_job: Reschedule an existing job
-- time.get_current_time: Get current time
-
-INSTRUCTIONS:
-1. For VIEWING data, use get_* functions (return real data).
-2. For CREATE/UPDATE/DELETE, use *_api_call functions (return API structures).
-3. Use legacy functions for analysis and suggestions.
-4. Parse and convert time expressions to dates.
-5. Return data exactly as received from functions.
+        return self._get_system_prompt("job", language)
 
-ALWAYS return valid JSON with appropriate structure."""
-    
     def _get_expense_system_prompt(self, language: str) -> str:
         """Get system prompt for expense tracking agent"""
-        if language == "fr":
-            return """Tu es un assistant IA spécialisé dans le suivi des dépenses pour Devia.
-
-RÔLE: Analyser du texte de reçus ou des descriptions de dépenses pour créer des données de dépense structurées.
-
-FONCTIONS DISPONIBLES:
-- expense.extract_expense_from_text: Extraire une dépense du texte
-- expense.categorize_expense: Catégoriser la dépense
-- expense.calculate_vat: Calculer la TVA
-- expense.parse_receipt: Analyser un reçu
-
-INSTRUCTIONS:
-1. Analyser le texte pour identifier les informations de dépense
-2. Extraire description, montant, date, fournisseur
-3. Catégoriser automatiquement la dépense
-4. Calculer la TVA si applicable
-5. Générer un ID de dépense unique
-6. Retourner les données structurées en JSON
-
-TOUJOURS retourner un JSON valide avec la structure de dépense."""
-        else:
-            return """You are an AI assistant specialized in expense tracking for Devia.
-
-ROLE: Analyze receipt text or expense descriptions to create structured expense data.
-
-AVAILABLE FUNCTIONS:
-- expense.extract_expense_from_text: Extract expense from text
-- expense.categorize_expense: Categorize the expense
-- expense.calculate_vat: Calculate VAT amount
-- expense.parse_receipt: Parse receipt information
-
-INSTRUCTIONS:
-1. Analyze text to identify expense information
-2. Extract description, amount, date, vendor
-3. Automatically categorize the expense
-4. Calculate VAT if applicable
-5. Generate unique expense ID
-6. Return structured data as JSON
+        return self._get_system_prompt("expense", language)
 
-ALWAYS return valid JSON with expense structure."""
-    
     def _get_manual_task_system_prompt(self, language: str) -> str:
         """Get system prompt for manual task processing"""
-        return f"""You are an AI assistant for manual task management and planning.
-        
-LANGUAGE: Use {language} (English/French) for responses.
+        return self._get_system_prompt("manual_task", language)
 
-ROLE: Analyze manual task descriptions to create structured internal task data.
-
-AVAILABLE FUNCTIONS:
-- manual_task.extract_task_info: Extract task information from text
-- manual_task.set_priority: Set task priority level
-- manual_task.set_color: Set task color for visual organization
-- manual_task.parse_schedule: Parse date and time information
-- manual_task.create_task: Create a new manual task
-
-INSTRUCTIONS:
-1. Analyze text to identify task information (title, timing, priority)
-2. Extract color information if mentioned (red, blue, green, yellow, etc.)
-3. Parse date/time information (tomorrow, specific dates, time ranges)
-4. Determine task priority (high, medium, low)
-5. Extract duration or time blocks (9-5, 2 hours, etc.)
-6. Generate unique task ID
-7. Return structured task data as JSON
-
-TASK TYPES:
-- Internal planning tasks
-- Team coordination
-- Personal reminders
-- Maintenance tasks
-- Color-coded organization tasks
-
-ALWAYS return valid JSON with manual task structure."""
-    
     def is_initialized(self) -> bool:
         """Check if the service is properly initialized"""
         return self._initialized and self.kernel is not None and self.chat_service is not None
     
     async def test_openai_connection(self) -> bool:
-        """Test OpenAI connection"""
+        """
+        Test OpenAI connection
+        
+        The result is reused for CONNECTION_TEST_TTL_SECONDS; concurrent
+        callers share the in-flight check instead of each sending one.
+        """
+        if self._conn_test_cache is not None:
+            checked_at, result = self._conn_test_cache
+            if time.monotonic() - checked_at < self.CONNECTION_TEST_TTL_SECONDS:
+                return result
+        
+        if self._inflight_test is None:
+            self._inflight_test = asyncio.ensure_future(self._refresh_connection_test())
+            self._inflight_test.add_done_callback(self._clear_inflight_test)
+        
+        # Shield so a cancelled caller does not cancel the check for the others
+        return await asyncio.shield(self._inflight_test)
+    
+    async def _refresh_connection_test(self) -> bool:
+        """Run the connection test and cache its result"""
+        # Reuse a result another replica stored recently
+        shared_result = await self._get_shared_probe_result()
+        if shared_result is not None:
+            self._conn_test_cache = (time.monotonic(), shared_result)
+            return shared_result
+        
+        try:
+            result = await asyncio.wait_for(
+                self._run_connection_test(),
+                timeout=self.CONNECTION_TEST_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            self.logger.warning(f"OpenAI connection test timed out after {self.CONNECTION_TEST_TIMEOUT_SECONDS}s")
+            result = False
+        self._conn_test_cache = (time.monotonic(), result)
+        await self._set_shared_probe_result(result)
+        return result
+    
+    async def _get_shared_probe_result(self) -> Optional[bool]:
+        """Get the connection test result shared through Redis, if any"""
+        if self._redis is None:
+            return None
+        
+        try:
+            cached = await self._redis.get(self.PROBE_REDIS_KEY)
+        except Exception as e:
+            self.logger.warning(f"Could not read shared connection test result: {e}")
+            return None
+        
+        return None if cached is None else cached == b"1"
+    
+    async def _set_shared_probe_result(self, result: bool) -> None:
+        """Share the connection test result with other replicas through Redis"""
+        if self._redis is None:
+            return
+        
+        try:
+            await self._redis.set(self.PROBE_REDIS_KEY, b"1" if result else b"0", ex=self.PROBE_REDIS_TTL_SECONDS)
+        except Exception as e:
+            self.logger.warning(f"Could not store shared connection test result: {e}")
+    
+    def _clear_inflight_test(self, task: asyncio.Future) -> None:
+        """Free the single-flight slot once the shared check is done"""
+        if self._inflight_test is task:
+            self._inflight_test = None
+    
+    async def _run_connection_test(self) -> bool:
+        """
+        Check that OpenAI is reachable and the configured model is available
+        
+        Uses the models endpoint, which needs no inference and bills no
+        tokens; a chat probe is only sent when the key may not read models.
+        """
         try:
-            if not self.chat_service:
+            if not self.chat_service or not self.openai_client:
                 return False
             
-            # Simple test prompt
-            test_prompt = "Test connection - respond with 'OK'"
+            try:
+                async for attempt in self._retrying():
+                    with attempt:
+                        await self.openai_client.models.retrieve(self.settings.openai_model)
+                return True
+            except (NotFoundError, PermissionDeniedError) as e:
+                # Restricted (e.g. project-scoped) keys may not list models
+                self.logger.debug("Models endpoint unavailable, falling back to chat probe: %s", e)
             
-            # Create chat history
-            history = ChatHistory()
-            history.add_user_message(test_prompt)
-            
-            # Get response
-            response = await self.chat_service.get_chat_message_content(
-                chat_history=history,
-                settings=OpenAIChatPromptExecutionSettings(
-                    ai_model_id=self.settings.openai_model,
-                    max_tokens=10,
-                    temperature=0.1
-                )
-            )
+            # Stream the answer to the prebuilt test prompt; the first token is enough
+            async for attempt in self._retrying():
+                with attempt:
+                    stream = self.chat_service.get_streaming_chat_message_content(
+                        chat_history=self._test_history,
+                        settings=self._test_settings
+                    )
+                    async with aclosing(stream):
+                        async for message in stream:
+                            if message is not None and message.content:
+                                return True
             
-            return response and len(str(response).strip()) > 0
+            return False
             
-        except Exception as e:
-            self.logger.error(f"OpenAI connection test failed: {e}")
+        except Exception:
+            self.logger.exception("OpenAI connection test failed")
             return False
     
+    @staticmethod
+    def _retrying() -> AsyncRetrying:
+        """Retry policy for transient OpenAI errors (network, rate limit, 5xx)"""
+        return AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_exponential_jitter(initial=0.2, max=2.0),
+            retry=retry_if_exception(_is_transient_error),
+            reraise=True
+        )
+    
     async def cleanup(self) -> None:
-        """Cleanup resources"""
+        """Cleanup resources (safe to call more than once)"""
+        if not self._initialized:
+            return
+        
+        # Flip the flag before the first await so a concurrent or repeated call no-ops
+        self._initialized = False
+        
         try:
             self.logger.info("Cleaning up Semantic Kernel service...")
             
-            # Cleanup tools if they have cleanup methods
-            for tool in [self.invoice_tools, self.customer_tools, self.quote_tools, 
-                        self.job_tools, self.expense_tools]:
-                if tool and hasattr(tool, 'cleanup'):
-                    await tool.cleanup()
+            # Forget the tools before cleaning them up, so a later initialize()
+            # creates fresh ones and registers them on its new kernel
+            tools = list(self._cleanupable_tools)
+            self._tools.clear()
+            self._cleanupable_tools.clear()
+            for attribute, _, _ in self._AGENT_TOOLS.values():
+                setattr(self, attribute, None)
+            
+            # Cleanup tools that have cleanup methods concurrently
+            results = await asyncio.gather(*(tool.cleanup() for tool in tools), return_exceptions=True)
+            
+            for tool, result in zip(tools, results):
+                if isinstance(result, Exception):
+                    self.logger.error("Failed to clean up %s", type(tool).__name__, exc_info=result)
             
-            self._initialized = False
             self.logger.info("Semantic Kernel service cleaned up successfully")
             
-        except Exception as e:
-            self.logger.error(f"Error during cleanup: {e}")
\ No newline at end of file
+        except Exception:
+            self.logger.exception("Error during cleanup")
+    
+    async def shutdown(self) -> None:
+        """Clean up the service and close its Redis connection"""
+        await self.cleanup()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self.openai_client = None
+        self.embedding_client = None
@@ -5,12 +5,16 @@ Integrated directly into Devia backend for voice processing
 """
 
 import os
+import uuid
+import hashlib
 import logging
 import asyncio
-from pathlib import Path
-from typing import Optional, Dict, Any, List
-from openai import OpenAI, OpenAIError
-from config.settings import Settings
+import anyio
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, ClassVar, FrozenSet
+from openai import AsyncOpenAI, OpenAIError
+from config.settings import get_settings
+from .http_client import get_shared_http_client
 
 class TextToSpeechService:
     """
@@ -19,13 +23,35 @@ class TextToSpeechService:
     """
     
     # Available TTS models
-    AVAILABLE_MODELS = ["tts-1", "tts-1-hd"]
+    AVAILABLE_MODELS: ClassVar[Tuple[str, ...]] = ("tts-1", "tts-1-hd")
+    _MODELS_SET: ClassVar[FrozenSet[str]] = frozenset(AVAILABLE_MODELS)
     DEFAULT_MODEL = "tts-1"  # Fast, good quality
     HD_MODEL = "tts-1-hd"   # Higher quality, slower
     
     # Available voices
-    AVAILABLE_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+    AVAILABLE_VOICES: ClassVar[Tuple[str, ...]] = ("alloy", "echo", "fable", "onyx", "nova", "shimmer")
+    _VOICES_SET: ClassVar[FrozenSet[str]] = frozenset(AVAILABLE_VOICES)
     DEFAULT_VOICE = "alloy"
+    _VOICE_DESCRIPTIONS: ClassVar[Dict[str, str]] = {
+        "alloy": "Neutral, balanced voice suitable for most content",
+        "echo": "Clear, articulate voice with professional tone",
+        "fable": "Warm, storytelling voice with expressive qualities",
+        "onyx": "Deep, authoritative voice with strong presence",
+        "nova": "Friendly, approachable voice with modern appeal",
+        "shimmer": "Bright, energetic voice with youthful qualities"
+    }
+    
+    # Maximum number of concurrent TTS requests in synthesize_multiple
+    MAX_CONCURRENT_SYNTHESES = 8
+    
+    # In-memory LRU cache of synthesized audio for repeated phrases
+    CACHE_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_MAX_ENTRY_BYTES = 1024 * 1024
+    
+    # (model, voice, text) digest -> audio bytes; shared by every instance since
+    # a service is created per connection/upload
+    _cache: ClassVar["OrderedDict[str, bytes]"] = OrderedDict()
+    _cache_size: ClassVar[int] = 0
     
     def __init__(self, api_key: Optional[str] = None, default_model: str = DEFAULT_MODEL):
         """
@@ -39,17 +65,70 @@ class TextToSpeechService:
         
         # Load API key from settings if not provided
         if api_key is None:
-            settings = Settings()
+            settings = get_settings()
             api_key = settings.openai_api_key
             
             if not settings.validate_openai_key():
                 raise RuntimeError("OpenAI API key not found in settings or invalid")
         
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
-        self.default_model = default_model if default_model in self.AVAILABLE_MODELS else self.DEFAULT_MODEL
+        self.client = AsyncOpenAI(api_key=self.api_key, http_client=get_shared_http_client())
+        self.default_model = default_model if default_model in self._MODELS_SET else self.DEFAULT_MODEL
+        
+        self.logger.info("Text-to-Speech Service initialized with model: %s", self.default_model)
+    
+    def _resolve_voice_and_model(self, voice: str, model: Optional[str]) -> Tuple[str, str]:
+        """
+        Fall back to the default voice and model when the requested ones are not available
+        
+        Args:
+            voice: Requested voice
+            model: Requested TTS model (default model if None)
+        
+        Returns:
+            Tuple of (voice, model) to use
+        """
+        model = model or self.default_model
+        if voice not in self._VOICES_SET:
+            self.logger.warning("Voice '%s' not in available voices: %s", voice, self.AVAILABLE_VOICES)
+            voice = self.DEFAULT_VOICE
+        
+        if model not in self._MODELS_SET:
+            self.logger.warning("Model '%s' not in available models: %s", model, self.AVAILABLE_MODELS)
+            model = self.default_model
+        
+        return voice, model
+    
+    @staticmethod
+    def _cache_key(text: str, voice: str, model: str) -> str:
+        """Get the audio cache key of a synthesis request"""
+        return hashlib.blake2b(f"{model}|{voice}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    @classmethod
+    def _get_cached_audio(cls, key: str) -> Optional[bytes]:
+        """Get cached audio, marking it as recently used"""
+        audio = cls._cache.get(key)
+        if audio is not None:
+            cls._cache.move_to_end(key)
+        return audio
+    
+    @classmethod
+    def _cache_audio(cls, key: str, audio: bytes) -> None:
+        """
+        Cache synthesized audio, evicting least recently used entries over budget
         
-        self.logger.info(f"Text-to-Speech Service initialized with model: {self.default_model}")
+        Args:
+            key: Key from _cache_key
+            audio: Audio bytes
+        """
+        if len(audio) > cls.CACHE_MAX_ENTRY_BYTES or key in cls._cache:
+            return
+        
+        cls._cache[key] = audio
+        cls._cache_size += len(audio)
+        while cls._cache_size > cls.CACHE_MAX_BYTES:
+            _, evicted = cls._cache.popitem(last=False)
+            cls._cache_size -= len(evicted)
     
     async def synthesize(
         self, 
@@ -72,7 +151,7 @@ class TextToSpeechService:
         """
         try:
             # Validate inputs
-            if not text or not text.strip():
+            if not text or text.isspace():
                 return {
                     "success": False,
                     "error": "Text cannot be empty",
@@ -80,25 +159,19 @@ class TextToSpeechService:
                 }
             
             # Set defaults
-            model = model or self.default_model
-            if voice not in self.AVAILABLE_VOICES:
-                self.logger.warning(f"Voice '{voice}' not in available voices: {self.AVAILABLE_VOICES}")
-                voice = self.DEFAULT_VOICE
-            
-            if model not in self.AVAILABLE_MODELS:
-                self.logger.warning(f"Model '{model}' not in available models: {self.AVAILABLE_MODELS}")
-                model = self.default_model
+            voice, model = self._resolve_voice_and_model(voice, model)
             
-            # Generate output path if not provided
+            # Generate a unique output path if not provided, so concurrent
+            # requests never write to the same file
             if not output_path:
-                import time
-                timestamp = int(time.time())
-                output_path = f"temp/tts_output_{timestamp}.mp3"
+                output_path = f"temp/tts_output_{uuid.uuid4().hex}.mp3"
             
             # Ensure directory exists
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
             
-            self.logger.info(f"Synthesizing text to speech: {len(text)} characters, voice: {voice}, model: {model}")
+            self.logger.info("Synthesizing text to speech: %d characters, voice: %s, model: %s", len(text), voice, model)
             
             # Prepare TTS parameters
             tts_params = {
@@ -107,12 +180,30 @@ class TextToSpeechService:
                 "voice": voice
             }
             
-            # Call OpenAI TTS API
-            response = self.client.audio.speech.create(**tts_params)
+            cache_key = self._cache_key(text, voice, model)
+            cached_audio = self._get_cached_audio(cache_key)
             
-            # Save audio to file
-            with open(output_path, "wb") as f:
-                f.write(response.content)
+            if cached_audio is not None:
+                self.logger.info("TTS cache hit")
+                async with await anyio.open_file(output_path, "wb") as f:
+                    await f.write(cached_audio)
+                file_size_bytes = len(cached_audio)
+            else:
+                # Call OpenAI TTS API and stream the audio straight to the file,
+                # counting the bytes written instead of stat-ing the file afterwards.
+                # Short clips are also kept in memory for the cache.
+                file_size_bytes = 0
+                chunks: List[bytes] = []
+                async with self.client.audio.speech.with_streaming_response.create(**tts_params) as response:
+                    async with await anyio.open_file(output_path, "wb") as f:
+                        async for chunk in response.iter_bytes():
+                            await f.write(chunk)
+                            file_size_bytes += len(chunk)
+                            if file_size_bytes <= self.CACHE_MAX_ENTRY_BYTES:
+                                chunks.append(chunk)
+                
+                if file_size_bytes <= self.CACHE_MAX_ENTRY_BYTES:
+                    self._cache_audio(cache_key, b"".join(chunks))
             
             # Return successful result
             result = {
@@ -121,21 +212,21 @@ class TextToSpeechService:
                 "voice": voice,
                 "output_path": output_path,
                 "text_length": len(text),
-                "file_size_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else 0
+                "file_size_bytes": file_size_bytes
             }
             
-            self.logger.info(f"TTS synthesis successful: {output_path}")
+            self.logger.info("TTS synthesis successful: %s", output_path)
             return result
             
         except OpenAIError as e:
-            self.logger.error(f"OpenAI API error during TTS: {e}")
+            self.logger.error("OpenAI API error during TTS: %s", e)
             return {
                 "success": False,
                 "error": f"OpenAI API error: {str(e)}",
                 "output_path": None
             }
         except Exception as e:
-            self.logger.error(f"Unexpected error during TTS: {e}")
+            self.logger.error("Unexpected error during TTS: %s", e)
             return {
                 "success": False,
                 "error": f"TTS error: {str(e)}",
@@ -146,7 +237,8 @@ class TextToSpeechService:
         self, 
         text: str, 
         voice: str = DEFAULT_VOICE, 
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        use_cache: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Convert text to speech and return as bytes
@@ -155,13 +247,14 @@ class TextToSpeechService:
             text: Text to convert to speech
             voice: Voice to use
             model: TTS model to use
+            use_cache: Whether cached audio may be returned instead of calling the API
         
         Returns:
             Dict containing audio bytes and metadata
         """
         try:
             # Validate inputs
-            if not text or not text.strip():
+            if not text or text.isspace():
                 return {
                     "success": False,
                     "error": "Text cannot be empty",
@@ -169,13 +262,9 @@ class TextToSpeechService:
                 }
             
             # Set defaults
-            model = model or self.default_model
-            if voice not in self.AVAILABLE_VOICES:
-                voice = self.DEFAULT_VOICE
-            if model not in self.AVAILABLE_MODELS:
-                model = self.default_model
+            voice, model = self._resolve_voice_and_model(voice, model)
             
-            self.logger.info(f"Synthesizing text to bytes: {len(text)} characters")
+            self.logger.info("Synthesizing text to bytes: %d characters", len(text))
             
             # Prepare TTS parameters
             tts_params = {
@@ -184,31 +273,39 @@ class TextToSpeechService:
                 "voice": voice
             }
             
-            # Call OpenAI TTS API
-            response = self.client.audio.speech.create(**tts_params)
+            cache_key = self._cache_key(text, voice, model)
+            audio_bytes = self._get_cached_audio(cache_key) if use_cache else None
+            
+            if audio_bytes is not None:
+                self.logger.info("TTS cache hit")
+            else:
+                # Call OpenAI TTS API
+                response = await self.client.audio.speech.create(**tts_params)
+                audio_bytes = response.content
+                self._cache_audio(cache_key, audio_bytes)
             
             # Return audio bytes
             result = {
                 "success": True,
                 "model": model,
                 "voice": voice,
-                "audio_bytes": response.content,
+                "audio_bytes": audio_bytes,
                 "text_length": len(text),
-                "file_size_bytes": len(response.content)
+                "file_size_bytes": len(audio_bytes)
             }
             
-            self.logger.info(f"TTS synthesis to bytes successful: {len(response.content)} bytes")
+            self.logger.info("TTS synthesis to bytes successful: %d bytes", len(audio_bytes))
             return result
             
         except OpenAIError as e:
-            self.logger.error(f"OpenAI API error during TTS to bytes: {e}")
+            self.logger.error("OpenAI API error during TTS to bytes: %s", e)
             return {
                 "success": False,
                 "error": f"OpenAI API error: {str(e)}",
                 "audio_bytes": None
             }
         except Exception as e:
-            self.logger.error(f"Unexpected error during TTS to bytes: {e}")
+            self.logger.error("Unexpected error during TTS to bytes: %s", e)
             return {
                 "success": False,
                 "error": f"TTS error: {str(e)}",
@@ -223,7 +320,7 @@ class TextToSpeechService:
         output_dir: str = "temp"
     ) -> List[Dict[str, Any]]:
         """
-        Convert multiple texts to speech
+        Convert multiple texts to speech concurrently
         
         Args:
             texts: List of texts to convert
@@ -234,34 +331,41 @@ class TextToSpeechService:
         Returns:
             List of synthesis results
         """
-        results = []
+        os.makedirs(output_dir, exist_ok=True)
+        # Validate once for the whole batch
+        voice, model = self._resolve_voice_and_model(voice, model)
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SYNTHESES)
         
-        for i, text in enumerate(texts):
-            output_path = f"{output_dir}/tts_batch_{i+1}.mp3"
-            result = await self.synthesize(text, voice, output_path, model)
-            results.append(result)
+        async def synthesize_one(index: int, text: str) -> Dict[str, Any]:
+            async with semaphore:
+                output_path = f"{output_dir}/tts_batch_{index + 1}.mp3"
+                return await self.synthesize(text, voice, output_path, model)
         
-        return results
+        # Results keep the order of the input texts
+        return await asyncio.gather(
+            *(synthesize_one(i, text) for i, text in enumerate(texts))
+        )
     
-    def get_available_voices(self) -> List[str]:
+    def get_available_voices(self) -> Tuple[str, ...]:
         """
-        Get list of available voices
+        Get available voices
         
         Returns:
-            List of available voice names
+            Immutable tuple of available voice names
         """
-        return self.AVAILABLE_VOICES.copy()
+        return self.AVAILABLE_VOICES
     
-    def get_available_models(self) -> List[str]:
+    def get_available_models(self) -> Tuple[str, ...]:
         """
-        Get list of available TTS models
+        Get available TTS models
         
         Returns:
-            List of available model names
+            Immutable tuple of available model names
         """
-        return self.AVAILABLE_MODELS.copy()
+        return self.AVAILABLE_MODELS
     
-    def get_voice_description(self, voice: str) -> str:
+    @classmethod
+    def get_voice_description(cls, voice: str) -> str:
         """
         Get description of a voice
         
@@ -271,16 +375,7 @@ class TextToSpeechService:
         Returns:
             Description of the voice characteristics
         """
-        voice_descriptions = {
-            "alloy": "Neutral, balanced voice suitable for most content",
-            "echo": "Clear, articulate voice with professional tone",
-            "fable": "Warm, storytelling voice with expressive qualities",
-            "onyx": "Deep, authoritative voice with strong presence",
-            "nova": "Friendly, approachable voice with modern appeal",
-            "shimmer": "Bright, energetic voice with youthful qualities"
-        }
-        
-        return voice_descriptions.get(voice, "Voice description not available")
+        return cls._VOICE_DESCRIPTIONS.get(voice, "Voice description not available")
     
     async def test_connection(self) -> bool:
         """
@@ -292,7 +387,7 @@ class TextToSpeechService:
         try:
             # Test with a simple phrase
             test_text = "Hello, this is a test."
-            result = await self.synthesize_to_bytes(test_text)
+            result = await self.synthesize_to_bytes(test_text, use_cache=False)
             
             if result and result.get("success"):
                 self.logger.info("TTS API connection test successful")
@@ -302,7 +397,7 @@ class TextToSpeechService:
                 return False
                 
         except Exception as e:
-            self.logger.error(f"TTS connection test failed: {e}")
+            self.logger.error("TTS connection test failed: %s", e)
             return False
     
     def estimate_audio_duration(self, text: str, words_per_minute: int = 150) -> float:
@@ -331,15 +426,16 @@ class TextToSpeechService:
         Returns:
             Validation result
         """
-        if len(text) > max_length:
+        length = len(text)
+        if length > max_length:
             return {
                 "valid": False,
-                "error": f"Text length ({len(text)}) exceeds maximum ({max_length})",
+                "error": f"Text length ({length}) exceeds maximum ({max_length})",
                 "suggestion": "Consider splitting the text into smaller chunks"
             }
         
         return {
             "valid": True,
-            "length": len(text),
+            "length": length,
             "estimated_duration": self.estimate_audio_duration(text)
         }
\ No newline at end of file
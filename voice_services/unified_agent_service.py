@@ -4,14 +4,23 @@ Handles single prompt workflow with intent detection, data extraction, and respo
 Enhanced with audio transcription and text-to-speech capabilities
 """
 
-import json
+import asyncio
+import copy
 import logging
+import re
+import textwrap
 import uuid
-from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Tuple, ClassVar, Mapping
 from datetime import datetime
 from enum import Enum
 
-from services.semantic_kernel_service import SemanticKernelService
+import orjson
+from cachetools import TTLCache
+
+from .semantic_kernel_service import SemanticKernelService
 from .unified_audio_service import UnifiedAudioService
 from tools.client_tools import ClientTools
 from tools.invoice_tools import InvoiceTools
@@ -47,6 +56,334 @@ class ConversationState(str, Enum):
     RESPONSE_GENERATION = "response_generation"
     COMPLETED = "completed"
 
+@dataclass(slots=True)
+class Conversation:
+    """State of a user's ongoing conversation with the agent"""
+    state: ConversationState = ConversationState.INTENT_DETECTION
+    intent: Optional[Intent] = None
+    operation: Operation = Operation.UNKNOWN
+    confidence: float = 0.0
+    data: Dict[str, Any] = field(default_factory=dict)
+    missing_data_attempts: int = 0
+    history: List[Dict] = field(default_factory=list)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+# Prompt normalization for the intent detection cache
+_WHITESPACE_RE = re.compile(r"\s+")
+_TERMINAL_PUNCTUATION = ".!?;:,… "
+
+# Intent/operation names returned by the AI, including common variants
+_INTENT_LOOKUP: Dict[str, Intent] = {
+    **{intent.value: intent for intent in Intent},
+    "manual task": Intent.MANUAL_TASK,
+    "task": Intent.MANUAL_TASK,
+    "tasks": Intent.MANUAL_TASK,
+    "client": Intent.CUSTOMER,
+    "clients": Intent.CUSTOMER,
+    "customers": Intent.CUSTOMER,
+    "invoices": Intent.INVOICE,
+    "bill": Intent.INVOICE,
+    "quotes": Intent.QUOTE,
+    "estimate": Intent.QUOTE,
+    "expenses": Intent.EXPENSE,
+    "jobs": Intent.JOB,
+}
+_OPERATION_LOOKUP: Dict[str, Operation] = {
+    **{operation.value: operation for operation in Operation},
+    "list": Operation.GET,
+    "read": Operation.GET,
+    "retrieve": Operation.GET,
+    "add": Operation.CREATE,
+    "edit": Operation.UPDATE,
+    "modify": Operation.UPDATE,
+    "remove": Operation.DELETE,
+}
+
+# Optional markdown code fence around an AI response
+_FENCE_RE = re.compile(r"^\s*(?:```(?:json)?)?\s*(.*?)\s*(?:```)?\s*$", re.S)
+
+# Commands that reset the conversation
+_RESET_RE = re.compile(r"\b(?:never mind|cancel|start over|reset|stop)\b")
+
+# Fallback keyword matching for GET requests when the AI fails (substring matches).
+# One anchored pattern: a GET word anywhere, then the first intent in priority order
+# whose keywords appear anywhere; the empty group named after that intent matches
+_GET_WORDS = r"show|list|get|display|see|view|all my|my clients|my invoices|my jobs|my expenses|my quotes"
+_GET_FALLBACK_KEYWORDS: Tuple[Tuple[Intent, str], ...] = (
+    (Intent.CUSTOMER, r"client|customer|contact"),
+    (Intent.INVOICE, r"invoice|bill"),
+    (Intent.JOB, r"job|appointment|meeting|schedule"),
+    (Intent.EXPENSE, r"expense|cost|spending"),
+    (Intent.QUOTE, r"quote|estimate|proposal"),
+)
+_FALLBACK_RE = re.compile(
+    rf"(?=.*?(?:{_GET_WORDS}))(?:"
+    + "|".join(rf"(?=.*?(?:{keywords}))(?P<{intent.value}>)" for intent, keywords in _GET_FALLBACK_KEYWORDS)
+    + ")",
+    re.I | re.S
+)
+
+# Unambiguous requests routed without the AI: "show my clients", "list all invoices", ...
+_GET_ALL_PREFIX = r"^(?:show|list|get|display|view|see|retrieve)(?: me)?(?: all)?(?: of)?(?: my| the)? "
+_GET_ALL_ROUTES: Tuple[Tuple["re.Pattern[str]", Intent], ...] = tuple(
+    (re.compile(_GET_ALL_PREFIX + nouns + "$"), intent)
+    for nouns, intent in (
+        (r"(?:manual tasks|tasks|reminders)", Intent.MANUAL_TASK),
+        (r"(?:clients|customers|contacts)", Intent.CUSTOMER),
+        (r"(?:invoices|bills)", Intent.INVOICE),
+        (r"(?:quotes|estimates|proposals)", Intent.QUOTE),
+        (r"(?:expenses)", Intent.EXPENSE),
+        (r"(?:jobs|appointments)", Intent.JOB),
+    )
+)
+# The rubric makes a color + task request always a manual task
+_COLOR_TASK_RE = re.compile(
+    r"\b(?:red|blue|green|yellow|orange|purple|pink|black|white|gray|grey)\b.*\b(?:task|work|reminder)s?\b"
+)
+_CREATE_VERB_RE = re.compile(r"^(?:create|add|make|schedule|book|new|plan)\b")
+_GET_VERB_RE = re.compile(r"^(?:show|list|get|display|view|see|find)\b")
+# Confidence reported for requests routed without the AI
+_ROUTED_INTENT_CONFIDENCE = 0.95
+
+# Intent rubric shared by intent detection and the combined detection + extraction call
+_INTENT_RUBRIC = """
+INTENT DETECTION PRIORITY ORDER (Check in this order):
+1. MANUAL_TASK (Highest Priority)
+2. CUSTOMER
+3. INVOICE 
+4. QUOTE
+5. EXPENSE
+6. JOB (Lowest Priority - only if no other intent matches)
+
+OPERATIONS:
+- get: Viewing/retrieving existing data (show, list, get, display, find, see, view, retrieve, "all my")
+- create: Creating new data (create, add, schedule, book, make, generate, new)
+- update: Modifying existing data (update, change, modify, edit, adjust)
+- delete: Removing data (delete, remove, cancel, eliminate)
+
+MANUAL_TASK INDICATORS (Check FIRST - Highest Priority):
+✅ Color words: red, blue, green, yellow, orange, purple, pink, black, white, gray
+✅ Task language: "task", "manual task", "planning", "reminder", "internal"
+✅ Personal/team context: "my task", "remind me", "team meeting", "internal planning"
+✅ Non-client work: No specific client names mentioned
+✅ Planning context: "work task", "maintenance task", "planning task"
+✅ Time-only scheduling: Just times without client context
+
+CUSTOMER INDICATORS:
+✅ Client management: "client", "customer", "contact", customer data"
+✅ Customer operations: "add client", "show customers", "client information"
+
+INVOICE INDICATORS:
+✅ Billing: "invoice", "bill", "payment", "charge", "billing"
+
+QUOTE INDICATORS:
+✅ Estimates: "quote", "estimate", "proposal", "pricing"
+
+EXPENSE INDICATORS:
+✅ Costs: "expense", "receipt", "cost", "spending", "financial tracking"
+
+JOB INDICATORS (Check LAST - Only if no manual_task match):
+✅ Client-specific work: "for [ClientName]", "with [ClientName]", specific company names
+✅ Billable services: "installation for client", "service appointment", "customer meeting"
+✅ Professional appointments: "appointment with client", "customer service call"
+
+CRITICAL RULES:
+🔴 IF color mentioned → ALWAYS manual_task (red task, blue work, green reminder)
+🔴 IF "task" + no client name → ALWAYS manual_task  
+🔴 IF "planning" or "reminder" → ALWAYS manual_task
+🔴 IF client name mentioned → Then consider job
+🔴 IF just time/date without client → manual_task
+
+EXAMPLES - MANUAL_TASK (High Priority):
+❌ "create a red placo work task for tomorrow 9-5" → manual_task, create
+❌ "add yellow planning task for Monday" → manual_task, create
+❌ "make blue reminder task" → manual_task, create
+❌ "schedule green work task" → manual_task, create
+❌ "create maintenance task for tomorrow" → manual_task, create
+❌ "add placo work task" → manual_task, create
+❌ "show my manual tasks" → manual_task, get
+❌ "list red tasks" → manual_task, get
+
+EXAMPLES - JOB (Low Priority):
+✅ "schedule website maintenance for ABC Corp" → job, create
+✅ "book appointment with John Smith" → job, create
+✅ "create meeting for client XYZ" → job, create
+✅ "show jobs for ABC Corp" → job, get
+
+EXAMPLES - OTHER:
+✅ "show my clients" → customer, get
+✅ "create invoice" → invoice, create
+✅ "add expense" → expense, create
+✅ "generate quote" → quote, create
+
+"""
+
+# Structured output schema of the intent detection response
+_INTENT_SCHEMA_PROPERTIES: Dict[str, Any] = {
+    "intent": {"type": "string", "enum": [intent.value for intent in Intent]},
+    "operation": {"type": "string", "enum": [operation.value for operation in Operation]},
+    "confidence": {"type": "number"},
+    "reasoning": {"type": "string"},
+}
+# Not strict: the extracted fields depend on the detected intent
+_DETECT_AND_EXTRACT_JSON_SCHEMA: Dict[str, Any] = {
+    "name": "intent_detection_with_data",
+    "strict": False,
+    "schema": {
+        "type": "object",
+        "properties": {**_INTENT_SCHEMA_PROPERTIES, "extracted_data": {"type": "object"}},
+        "required": [*_INTENT_SCHEMA_PROPERTIES, "extracted_data"],
+    },
+}
+
+# Fields to extract for each intent
+_EXTRACTION_PROMPT_SOURCES: Dict[Intent, str] = {
+    Intent.INVOICE: """
+    Extract invoice data from this prompt. Return JSON with these fields:
+    - customer_name: Customer/client name
+    - customer_email: Email address
+    - customer_phone: Phone number (optional)
+    - customer_address: Address (optional)
+    - items: Array of {description, quantity, unit_price, total}
+    - subtotal: Subtotal amount
+    - tax_rate: Tax rate (default 0.20)
+    - tax_amount: Tax amount
+    - total_amount: Final total
+    - invoice_date: Date (ISO format, default today)
+    - due_date: Due date (ISO format, default +30 days)
+    """,
+    Intent.QUOTE: """
+    Extract comprehensive quote data from this prompt. Return JSON with these fields:
+    
+    CLIENT INFORMATION:
+    - customer_name: Customer/client full name
+    - customer_email: Email address
+    - customer_phone: Phone number (optional)
+    - customer_company_type: "COMPANY" or "INDIVIDUAL" (based on context)
+    
+    PROJECT DETAILS:
+    - title: Quote title/subject
+    - project_name: Project or job name (mandatory)
+    - project_street_address: Street address component (optional)
+    - project_zip_code: ZIP/postal code (optional)
+    - project_city: City name (optional)
+    
+    QUOTE DETAILS:
+    - services: Array of {description, estimated_hours, hourly_rate, total, type}
+    - subtotal: Subtotal amount before discounts
+    
+    DISCOUNT INFORMATION:
+    - discount: Discount amount or percentage value
+    - discount_type: "FIXED" (euro amount) or "PERCENTAGE"
+    
+    DOWN PAYMENT INFORMATION:
+    - down_payment: Down payment amount or percentage value
+    - down_payment_type: "FIXED" (euro amount) or "PERCENTAGE"
+    
+    TAX AND TOTALS:
+    - vat_rate: VAT rate (default 0.20 = 20%)
+    - estimated_total: Final estimated total after all calculations
+    
+    DATES:
+    - valid_until: Quote validity date (ISO format, default +30 days)
+    
+    NOTES (categorize appropriately):
+    - internal_notes: Internal notes (not visible to client)
+    - public_notes: Notes visible on PDF/to client
+    
+    SIGNATURES (if mentioned):
+    - contractor_signature: Contractor signature reference
+    - client_signature: Client signature reference
+    
+    Extract discount type:
+    - PERCENTAGE: if "%" symbol present or percentage mentioned
+    - FIXED: if euro/currency amount specified
+    
+    Determine company type from context:
+    - INDIVIDUAL: "person", "individual", "freelancer", "self-employed"
+    - COMPANY: "company", "business", "corp", "ltd", "organization"
+    """,
+    Intent.CUSTOMER: """
+    Extract customer data from this prompt. Return JSON with these fields:
+    - name: Full name
+    - email: Email address
+    - phone: Phone number
+    - address: Full address
+    - company: Company name (optional)
+    - notes: Additional notes (optional)
+    - language_preference: Language preference (en/fr)
+    """,
+    Intent.JOB: """
+    Extract job data from this prompt. Return JSON with these fields:
+    - title: Job title/description
+    - customer_name: Customer name
+    - customer_email: Customer email (optional)
+    - scheduled_date: Scheduled date (ISO format)
+    - scheduled_time: Scheduled time (HH:MM format)
+    - duration: Duration in hours
+    - location: Job location (optional)
+    - notes: Additional notes (optional)
+    """,
+    Intent.EXPENSE: """
+    Extract expense data from this prompt. Return JSON with these fields:
+    - description: Expense description
+    - amount: Amount spent
+    - date: Expense date (ISO format)
+    - category: Expense category
+    - vendor: Vendor/supplier name (optional)
+    - payment_method: Payment method (optional)
+    - receipt_number: Receipt number (optional)
+    - vat_rate: VAT rate (default 0.20)
+    - vat_amount: VAT amount
+    """,
+    Intent.MANUAL_TASK: """
+    Extract manual task data from this prompt. Return JSON with these fields:
+    - title: Task title/description
+    - start_time: Start date and time (ISO format)
+    - end_time: End date and time (ISO format)
+    - color: Color (hex code, optional, default #ff0000)
+    - client_id: Associated client ID (optional)
+    - assigned_to: Assigned worker/team (optional)
+    - location: Task location/address (optional)
+    - notes: Task notes/details (optional)
+    - is_all_day: Whether this is an all-day task (boolean, optional)
+    """
+}
+
+# Dedented once at import so the source indentation is not sent with every prompt
+_EXTRACTION_PROMPTS: Mapping[Intent, str] = MappingProxyType({
+    intent: textwrap.dedent(text).strip() for intent, text in _EXTRACTION_PROMPT_SOURCES.items()
+})
+
+_EXTRACTION_SCHEMAS = "\n\n".join(
+    f"{intent.value.upper()} FIELDS:\n{schema}" for intent, schema in _EXTRACTION_PROMPTS.items()
+)
+
+_DETECT_AND_EXTRACT_FORMAT = """
+DATA EXTRACTION:
+If the operation is create, update or delete, also extract the data of the request into
+"extracted_data", using ONLY the fields of the detected intent below. Leave out fields
+that are not mentioned. For get operations, return an empty "extracted_data" object.
+
+""" + _EXTRACTION_SCHEMAS + """
+
+Response format:
+{
+    "intent": "intent_name",
+    "operation": "operation_name",
+    "confidence": 0.95,
+    "reasoning": "Brief explanation focusing on key indicators found",
+    "extracted_data": {}
+}
+"""
+
+# Static system prompt; only the user message varies between requests
+_DETECT_AND_EXTRACT_SYSTEM_PROMPT = (
+    "Analyze the user prompt, determine their intent and operation, and extract its data. Respond with JSON only.\n"
+    + _INTENT_RUBRIC + _DETECT_AND_EXTRACT_FORMAT
+)
+
 class UnifiedAgentService:
     """
     Unified service that handles all AI agent interactions through a single endpoint
@@ -54,14 +391,39 @@ class UnifiedAgentService:
     Workflow: Audio -> Transcription -> Intent Detection -> Data Extraction -> Response -> TTS
     """
     
+    # Maximum number of memoized intent detections
+    DETECTION_CACHE_SIZE = 4096
+    
+    # Required fields for each intent
+    REQUIRED_FIELDS: ClassVar[Mapping[Intent, Tuple[str, ...]]] = MappingProxyType({
+        Intent.INVOICE: (
+            "customer_name", "customer_email", "items", "total_amount", "title"
+        ),
+        Intent.QUOTE: (
+            "customer_name", "customer_email", "services", "estimated_total"
+        ),
+        Intent.CUSTOMER: (
+            "name", "email", "phone", "address"
+        ),
+        Intent.JOB: (
+            "title", "customer_name", "scheduled_date", "duration"
+        ),
+        Intent.EXPENSE: (
+            "description", "amount", "date", "category"
+        ),
+        Intent.MANUAL_TASK: (
+            "title", "start_time", "end_time"
+        )
+    })
+    
     def __init__(self, sk_service: SemanticKernelService, settings: Settings = None):
         self.sk_service = sk_service
         self.logger = logging.getLogger(__name__)
         
         # Initialize settings
         if settings is None:
-            from config.settings import Settings
-            settings = Settings()
+            from config.settings import get_settings
+            settings = get_settings()
         self.settings = settings
         
         # Initialize tools
@@ -83,30 +445,17 @@ class UnifiedAgentService:
             self.audio_enabled = False
             self.logger.info("Unified Agent Service initialized without audio capabilities")
         
-        # In-memory conversation storage (replace with database in production)
-        self.conversations: Dict[str, Dict] = {}
-        
-        # Required fields for each intent
-        self.required_fields = {
-            Intent.INVOICE: [
-                "customer_name", "customer_email", "items", "total_amount", "title"
-            ],
-            Intent.QUOTE: [
-                "customer_name", "customer_email", "services", "estimated_total"
-            ],
-            Intent.CUSTOMER: [
-                "name", "email", "phone", "address"
-            ],
-            Intent.JOB: [
-                "title", "customer_name", "scheduled_date", "duration"
-            ],
-            Intent.EXPENSE: [
-                "description", "amount", "date", "category"
-            ],
-            Intent.MANUAL_TASK: [
-                "title", "start_time", "end_time"
-            ]
-        }
+        # In-memory conversation storage (replace with database in production);
+        # conversations idle for longer than the TTL are evicted
+        self.conversations: "TTLCache[str, Conversation]" = TTLCache(
+            maxsize=settings.max_sessions, ttl=settings.session_ttl_seconds
+        )
+        
+        # Intent detections in flight by (prompt, language); concurrent identical
+        # first turns wait for the same AI call instead of issuing their own
+        self._inflight_detections: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Recent AI intent detections by (normalized prompt, language), LRU ordered
+        self._detection_cache: "OrderedDict[Tuple[str, str], Tuple[Intent, Operation, float, Optional[Dict[str, Any]]]]" = OrderedDict()
     
     async def process_agent_request(
         self, 
@@ -134,11 +483,11 @@ class UnifiedAgentService:
             
             # Get or create conversation state
             conversation = self._get_conversation_state(user_id)
-            self.logger.info(f"Conversation state: {conversation['state']}, attempt: {conversation.get('missing_data_attempts', 0)}")
+            self.logger.info(f"Conversation state: {conversation.state}, attempt: {conversation.missing_data_attempts}")
             
             # Quick user commands: reset/cancel/start over
             lower_prompt = prompt.strip().lower()
-            if any(cmd in lower_prompt for cmd in ["never mind", "cancel", "start over", "reset", "stop"]):
+            if _RESET_RE.search(lower_prompt):
                 # Reset conversation and ask for clarification
                 self.reset_conversation(user_id)
                 conversation = self._get_conversation_state(user_id)
@@ -149,109 +498,138 @@ class UnifiedAgentService:
                 }
 
             # 1. Add User Input to History
-            conversation["history"].append({"role": "user", "content": prompt})
+            conversation.history.append({"role": "user", "content": prompt})
             
             # ... (Existing Reset Logic) ...
 
+            # Set when data came back with the intent, saving the extraction call
+            data_extracted = False
+            
             # Step 1: Intent Detection (if not already detected)
-            if conversation["state"] == ConversationState.INTENT_DETECTION:
-                intent, operation, confidence = await self._detect_intent(prompt, language)
-                conversation["intent"] = intent
-                conversation["operation"] = operation
-                conversation["confidence"] = confidence
-                conversation["data"] = {}
+            if conversation.state == ConversationState.INTENT_DETECTION:
+                # The prompt itself was just appended; only earlier turns are history
+                intent, operation, confidence, extracted_data = await self._detect_and_extract(
+                    prompt, language, conversation.history[:-1], session_id=user_id
+                )
+                conversation.intent = intent
+                conversation.operation = operation
+                conversation.confidence = confidence
+                conversation.data = {}
                 
                 self.logger.info(f"Intent detection result: intent={intent}, operation={operation}, confidence={confidence}")
                 
                 # Special handling for "get all" queries - skip data extraction entirely
                 if operation == Operation.GET and self._is_get_all_query(prompt):
                     self.logger.info(f"Detected 'get all' query for {intent.value}, skipping to response generation")
-                    conversation["state"] = ConversationState.RESPONSE_GENERATION
+                    conversation.state = ConversationState.RESPONSE_GENERATION
                 elif intent == Intent.UNKNOWN or confidence < 0.1:
                     self.logger.warning(f"Intent unclear or low confidence: {intent}, {confidence}")
                     return self._create_clarification_response(conversation, language)
+                elif (
+                    extracted_data  # empty: leave it to the dedicated extraction prompt
+                    and operation != Operation.GET
+                    and not self._is_specific_id_query(prompt, intent)
+                ):
+                    self._merge_conversation_data(conversation.data, extracted_data)
+                    conversation.state = ConversationState.DATA_COMPLETION
+                    data_extracted = True
                 else:
-                    conversation["state"] = ConversationState.DATA_EXTRACTION
+                    conversation.state = ConversationState.DATA_EXTRACTION
             
             else:
                 # If we're mid-conversation, check whether the user has changed their intent.
                 # Only attempt re-detection if we're not in data extraction/completion states (to avoid
                 # misinterpreting missing data inputs as new intents)
-                if conversation["state"] not in [ConversationState.DATA_EXTRACTION, ConversationState.DATA_COMPLETION]:
+                if conversation.state not in [ConversationState.DATA_EXTRACTION, ConversationState.DATA_COMPLETION]:
                     try:
-                        new_intent, new_operation, new_confidence = await self._detect_intent(prompt, language)
+                        # The new flow's data comes back with the re-detection, so a
+                        # change of intent does not cost a second AI round trip
+                        new_intent, new_operation, new_confidence, new_data = await self._detect_and_extract(
+                            prompt, language, conversation.history[:-1], session_id=user_id
+                        )
                         
                         # Special handling for "get all" queries - always switch to this flow
                         if new_operation == Operation.GET and self._is_get_all_query(prompt):
                             self.logger.info(f"Detected 'get all' query mid-conversation for {new_intent.value}, switching to direct response")
-                            conversation["intent"] = new_intent
-                            conversation["operation"] = new_operation
-                            conversation["confidence"] = new_confidence
-                            conversation["data"] = {}
-                            conversation["state"] = ConversationState.RESPONSE_GENERATION
+                            conversation.intent = new_intent
+                            conversation.operation = new_operation
+                            conversation.confidence = new_confidence
+                            conversation.data = {}
+                            conversation.state = ConversationState.RESPONSE_GENERATION
                         
                         # If the new intent/operation is different and confidence is reasonably high, switch flows
-                        elif new_intent != conversation.get("intent") and new_confidence >= 0.6:
-                            self.logger.info(f"User changed intent mid-flow from {conversation.get('intent')} to {new_intent} (conf={new_confidence})")
-                            conversation["intent"] = new_intent
-                            conversation["operation"] = new_operation
-                            conversation["confidence"] = new_confidence
+                        elif new_intent != conversation.intent and new_confidence >= 0.6:
+                            self.logger.info(f"User changed intent mid-flow from {conversation.intent} to {new_intent} (conf={new_confidence})")
+                            conversation.intent = new_intent
+                            conversation.operation = new_operation
+                            conversation.confidence = new_confidence
                             # Reset collected data but keep it optional to be merged later if fields overlap
-                            conversation["data"] = {}
-                            conversation["missing_data_attempts"] = 0
-                            conversation["state"] = ConversationState.DATA_EXTRACTION
+                            conversation.data = {}
+                            conversation.missing_data_attempts = 0
+                            if (
+                                new_data  # empty: leave it to the dedicated extraction prompt
+                                and new_operation != Operation.GET
+                                and not self._is_specific_id_query(prompt, new_intent)
+                            ):
+                                self._merge_conversation_data(conversation.data, new_data)
+                                conversation.state = ConversationState.DATA_COMPLETION
+                                data_extracted = True
+                            else:
+                                conversation.state = ConversationState.DATA_EXTRACTION
                     except Exception:
                         # If intent re-detection fails, continue with existing flow
                         self.logger.debug("Intent re-detection failed while mid-conversation; continuing existing flow")
             
             # Step 2: Data Extraction (initial or additional data)
-            if conversation["state"] in [ConversationState.DATA_EXTRACTION, ConversationState.DATA_COMPLETION]:
+            if not data_extracted and conversation.state in [ConversationState.DATA_EXTRACTION, ConversationState.DATA_COMPLETION]:
                 extracted_data = await self._extract_data(
-                    prompt, conversation["intent"], conversation.get("operation", Operation.UNKNOWN), language, conversation["history"]  # Pass history
+                    prompt, conversation.intent, conversation.operation, language, conversation.history,  # Pass history
+                    session_id=user_id
                 )
                 
                 # Merge data intelligently - preserve existing valid data
-                self._merge_conversation_data(conversation["data"], extracted_data)
-                conversation["state"] = ConversationState.DATA_COMPLETION
+                self._merge_conversation_data(conversation.data, extracted_data)
+                conversation.state = ConversationState.DATA_COMPLETION
             
             # Step 3: Check for Missing Data
-            if conversation["state"] == ConversationState.DATA_COMPLETION:
+            if conversation.state == ConversationState.DATA_COMPLETION:
                 missing_fields = self._check_missing_data(
-                    conversation["intent"], conversation.get("operation", Operation.UNKNOWN), conversation["data"]
+                    conversation.intent, conversation.operation, conversation.data
                 )
                 
                 if missing_fields:
+                    attempts = conversation.missing_data_attempts
                     # Check if we've already asked for missing data 2 times
-                    if conversation.get("missing_data_attempts", 0) >= 3: # Increased to 3
+                    if attempts >= 3: # Increased to 3
                         self.logger.info(f"Max attempts reached, filling missing fields with N/A: {missing_fields}")
                         # Fill missing fields with "N/A" and proceed
                         for field in missing_fields:
                             if field == "total_amount":
-                                conversation["data"][field] = 0.0
+                                conversation.data[field] = 0.0
                             elif field == "items":
-                                conversation["data"][field] = []
+                                conversation.data[field] = []
                             else:
-                                conversation["data"][field] = "N/A"
-                        conversation["state"] = ConversationState.RESPONSE_GENERATION
+                                conversation.data[field] = "N/A"
+                        conversation.state = ConversationState.RESPONSE_GENERATION
                     else:
                         # Increment attempt counter and ask for missing data
-                        conversation["missing_data_attempts"] = conversation.get("missing_data_attempts", 0) + 1
+                        conversation.missing_data_attempts = attempts + 1
                         
                         # Generate the question
                         response = self._create_missing_data_response(conversation, missing_fields, language)
                         
                         # Add AI Question to History so it remembers it asked!
-                        conversation["history"].append({"role": "assistant", "content": response["message"]})
+                        conversation.history.append({"role": "assistant", "content": response["message"]})
                         return response
                 else:
-                    conversation["state"] = ConversationState.RESPONSE_GENERATION
+                    conversation.state = ConversationState.RESPONSE_GENERATION
             
             # Step 4: Generate Final Response
-            if conversation["state"] == ConversationState.RESPONSE_GENERATION:
+            if conversation.state == ConversationState.RESPONSE_GENERATION:
                 response = await self._generate_final_response(
-                    conversation["intent"], conversation.get("operation", Operation.UNKNOWN), conversation["data"], language, user_id
+                    conversation.intent, conversation.operation, conversation.data, language, user_id
                 )
-                conversation["state"] = ConversationState.COMPLETED
+                conversation.state = ConversationState.COMPLETED
                 
                 # Reset conversation after successful response
                 if response.get("success", False):
@@ -266,179 +644,199 @@ class UnifiedAgentService:
             self.logger.error(f"Error processing agent request: {e}")
             return self._create_error_response(str(e), language)
     
-    async def _detect_intent(self, prompt: str, language: str) -> Tuple[Intent, Operation, float]:
+    async def _detect_and_extract(
+        self,
+        prompt: str,
+        language: str,
+        history: List[Dict] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[Intent, Operation, float, Optional[Dict[str, Any]]]:
         """
-        Detect user intent from the prompt using AI
+        Detect the intent and extract its data with a single AI call
+        
+        Args:
+            prompt: User's natural language prompt
+            language: Language preference (en/fr)
+            history: Earlier conversation turns, excluding the prompt itself
+            session_id: Conversation identifier, only used together with history
         
         Returns:
-            Tuple of (intent, confidence_score)
+            Tuple of (intent, operation, confidence, extracted data). Extracted
+            data is None when it could not be obtained with the intent, in
+            which case _extract_data() has to be called separately.
         """
-        intent_prompt = f"""
-        Analyze this user prompt and determine their intent and operation. Respond with JSON only.
-        
-        User prompt: "{prompt}"
-        
-        INTENT DETECTION PRIORITY ORDER (Check in this order):
-        1. MANUAL_TASK (Highest Priority)
-        2. CUSTOMER
-        3. INVOICE 
-        4. QUOTE
-        5. EXPENSE
-        6. JOB (Lowest Priority - only if no other intent matches)
-        
-        OPERATIONS:
-        - get: Viewing/retrieving existing data (show, list, get, display, find, see, view, retrieve, "all my")
-        - create: Creating new data (create, add, schedule, book, make, generate, new)
-        - update: Modifying existing data (update, change, modify, edit, adjust)
-        - delete: Removing data (delete, remove, cancel, eliminate)
-        
-        MANUAL_TASK INDICATORS (Check FIRST - Highest Priority):
-        ✅ Color words: red, blue, green, yellow, orange, purple, pink, black, white, gray
-        ✅ Task language: "task", "manual task", "planning", "reminder", "internal"
-        ✅ Personal/team context: "my task", "remind me", "team meeting", "internal planning"
-        ✅ Non-client work: No specific client names mentioned
-        ✅ Planning context: "work task", "maintenance task", "planning task"
-        ✅ Time-only scheduling: Just times without client context
-        
-        CUSTOMER INDICATORS:
-        ✅ Client management: "client", "customer", "contact", customer data"
-        ✅ Customer operations: "add client", "show customers", "client information"
-        
-        INVOICE INDICATORS:
-        ✅ Billing: "invoice", "bill", "payment", "charge", "billing"
-        
-        QUOTE INDICATORS:
-        ✅ Estimates: "quote", "estimate", "proposal", "pricing"
-        
-        EXPENSE INDICATORS:
-        ✅ Costs: "expense", "receipt", "cost", "spending", "financial tracking"
-        
-        JOB INDICATORS (Check LAST - Only if no manual_task match):
-        ✅ Client-specific work: "for [ClientName]", "with [ClientName]", specific company names
-        ✅ Billable services: "installation for client", "service appointment", "customer meeting"
-        ✅ Professional appointments: "appointment with client", "customer service call"
-        
-        CRITICAL RULES:
-        🔴 IF color mentioned → ALWAYS manual_task (red task, blue work, green reminder)
-        🔴 IF "task" + no client name → ALWAYS manual_task  
-        🔴 IF "planning" or "reminder" → ALWAYS manual_task
-        🔴 IF client name mentioned → Then consider job
-        🔴 IF just time/date without client → manual_task
-        
-        EXAMPLES - MANUAL_TASK (High Priority):
-        ❌ "create a red placo work task for tomorrow 9-5" → manual_task, create
-        ❌ "add yellow planning task for Monday" → manual_task, create
-        ❌ "make blue reminder task" → manual_task, create
-        ❌ "schedule green work task" → manual_task, create
-        ❌ "create maintenance task for tomorrow" → manual_task, create
-        ❌ "add placo work task" → manual_task, create
-        ❌ "show my manual tasks" → manual_task, get
-        ❌ "list red tasks" → manual_task, get
-        
-        EXAMPLES - JOB (Low Priority):
-        ✅ "schedule website maintenance for ABC Corp" → job, create
-        ✅ "book appointment with John Smith" → job, create
-        ✅ "create meeting for client XYZ" → job, create
-        ✅ "show jobs for ABC Corp" → job, get
-        
-        EXAMPLES - OTHER:
-        ✅ "show my clients" → customer, get
-        ✅ "create invoice" → invoice, create
-        ✅ "add expense" → expense, create
-        ✅ "generate quote" → quote, create
-        
-        Response format:
-        {{
-            "intent": "intent_name",
-            "operation": "operation_name", 
-            "confidence": 0.95,
-            "reasoning": "Brief explanation focusing on key indicators found"
-        }}
+        routed = self._route_intent(prompt)
+        if routed is not None:
+            self.logger.info(f"Intent routed without AI: {routed}")
+            intent, operation, confidence = routed
+            return intent, operation, confidence, None
+        
+        # Only first turns are shared; earlier turns make the answer user-specific
+        if history:
+            detection = await self._request_detect_and_extract(prompt, language, history, session_id)
+        else:
+            key = (self._normalize_prompt(prompt), language)
+            detection = self._detection_cache.get(key)
+            if detection is not None:
+                self._detection_cache.move_to_end(key)
+                self.logger.info("Intent detection cache hit")
+            else:
+                inflight = self._inflight_detections.get(key)
+                if inflight is None:
+                    # Shielded so a cancelled first caller does not cancel the waiters;
+                    # no session, as the call is shared by every user sending the prompt
+                    inflight = asyncio.ensure_future(self._request_detect_and_extract(prompt, language))
+                    self._inflight_detections[key] = inflight
+                    inflight.add_done_callback(lambda _: self._inflight_detections.pop(key, None))
+                detection = await asyncio.shield(inflight)
+                
+                # Extracted data may hold relative dates resolved against today, so
+                # only detections without data are memoized
+                if detection is not None and not detection[3]:
+                    self._detection_cache[key] = detection
+                    if len(self._detection_cache) > self.DETECTION_CACHE_SIZE:
+                        self._detection_cache.popitem(last=False)
+        
+        if detection is None:
+            # AI failed or confidence is low
+            intent, operation, confidence = self._match_intent_patterns(prompt)
+            return intent, operation, confidence, None
+        
+        intent, operation, confidence, extracted_data = detection
+        return intent, operation, confidence, copy.deepcopy(extracted_data)
+    
+    async def _request_detect_and_extract(
+        self,
+        prompt: str,
+        language: str,
+        history: List[Dict] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[Tuple[Intent, Operation, float, Optional[Dict[str, Any]]]]:
         """
+        Run the combined intent detection and data extraction call
         
+        Returns:
+            Detection tuple, or None if the AI failed or was not confident
+        """
         try:
-            # Use semantic kernel for intent detection
             result = await self.sk_service.process_invoice_request(
-                prompt=intent_prompt,
+                prompt=prompt,
                 context={"task": "intent_detection"},
-                language=language
+                language=language,
+                history=history,
+                session_id=session_id,
+                system_prompt=_DETECT_AND_EXTRACT_SYSTEM_PROMPT,
+                json_schema=_DETECT_AND_EXTRACT_JSON_SCHEMA
             )
             
-            # Parse AI response
             if result.get("success") and result.get("data"):
-                ai_response = result["data"]
-                self.logger.info(f"Raw AI response: {ai_response}")
-                
-                # Handle case where AI response is wrapped in "response" key
-                if isinstance(ai_response, dict) and "response" in ai_response:
-                    ai_response = ai_response["response"]
-                    
-                # Try to parse as JSON if it's a string
-                if isinstance(ai_response, str):
-                    # Strip markdown code blocks if present
-                    ai_response = ai_response.strip()
-                    if ai_response.startswith("```json"):
-                        ai_response = ai_response[7:]  # Remove ```json
-                    if ai_response.startswith("```"):
-                        ai_response = ai_response[3:]   # Remove ```
-                    if ai_response.endswith("```"):
-                        ai_response = ai_response[:-3]  # Remove ```
-                    ai_response = ai_response.strip()
-                    
-                    try:
-                        ai_response = json.loads(ai_response)
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Failed to parse AI response as JSON: {ai_response}")
-                        pass
-                
+                ai_response = self._unwrap_ai_response(result["data"])
                 self.logger.info(f"Processed AI response: {ai_response}")
                 
-                # Extract intent and operation data
-                if isinstance(ai_response, dict):
-                    intent_str = ai_response.get("intent", "unknown")
-                    operation_str = ai_response.get("operation", "unknown")
-                    confidence = ai_response.get("confidence", 0.0)
-                else:
-                    intent_str = "unknown"
-                    operation_str = "unknown"
-                    confidence = 0.0
-                
-                # Map string to enum (case-insensitive)
-                try:
-                    intent = Intent(intent_str.lower())
-                except ValueError:
-                    intent = Intent.UNKNOWN
-                    confidence = 0.0
-                
-                try:
-                    operation = Operation(operation_str.lower())
-                except ValueError:
-                    operation = Operation.UNKNOWN
-                
-                # If AI returns valid result with confidence > 0.6, RETURN IT IMMEDIATELY.
+                intent, operation, confidence = self._parse_intent_response(ai_response)
                 if confidence > 0.6:
-                    return intent, operation, confidence
-            
+                    extracted_data = ai_response.get("extracted_data")
+                    return intent, operation, confidence, extracted_data if isinstance(extracted_data, dict) else None
+        
         except Exception as e:
             self.logger.error(f"Intent detection failed: {e}")
         
-        # ONLY REACH HERE IF AI FAILED OR CONFIDENCE IS LOW
+        return None
+    
+    def _route_intent(self, prompt: str) -> Optional[Tuple[Intent, Operation, float]]:
+        """
+        Recognize unambiguous requests without calling the AI
+        
+        Args:
+            prompt: User's natural language prompt
         
-        # Fallback: Simple pattern matching
-        prompt_lower = prompt.lower()
+        Returns:
+            Tuple of (intent, operation, confidence), or None if the AI has to decide
+        """
+        normalized = self._normalize_prompt(prompt)
+        
+        for pattern, intent in _GET_ALL_ROUTES:
+            if pattern.match(normalized):
+                return intent, Operation.GET, _ROUTED_INTENT_CONFIDENCE
+        
+        if _COLOR_TASK_RE.search(normalized):
+            if _CREATE_VERB_RE.match(normalized):
+                return Intent.MANUAL_TASK, Operation.CREATE, _ROUTED_INTENT_CONFIDENCE
+            if _GET_VERB_RE.match(normalized):
+                return Intent.MANUAL_TASK, Operation.GET, _ROUTED_INTENT_CONFIDENCE
+        
+        return None
+    
+    @staticmethod
+    def _normalize_prompt(prompt: str) -> str:
+        """
+        Normalize a prompt so case, spacing and trailing punctuation
+        differences share an intent detection
+        """
+        return _WHITESPACE_RE.sub(" ", prompt.lower()).strip().rstrip(_TERMINAL_PUNCTUATION)
+    
+    def _unwrap_ai_response(self, ai_response: Any) -> Any:
+        """
+        Get the JSON payload of an agent result
+        
+        Args:
+            ai_response: "data" of the agent result
+        
+        Returns:
+            Parsed response, or None if it is a string that is not valid JSON
+        """
+        # Handle case where AI response is wrapped in "response" key
+        if isinstance(ai_response, dict) and "response" in ai_response:
+            ai_response = ai_response["response"]
+        
+        # Try to parse as JSON if it's a string
+        if isinstance(ai_response, str):
+            ai_response = self._strip_fences(ai_response)
+            
+            try:
+                return orjson.loads(ai_response)
+            except orjson.JSONDecodeError:
+                self.logger.warning(f"Failed to parse AI response as JSON: {ai_response}")
+                return None
+        
+        return ai_response
+    
+    @staticmethod
+    def _strip_fences(text: str) -> str:
+        """Remove surrounding whitespace and markdown code fences in one pass"""
+        return _FENCE_RE.match(text).group(1)
+    
+    def _parse_intent_response(self, ai_response: Any) -> Tuple[Intent, Operation, float]:
+        """
+        Map an intent detection response to intent, operation and confidence
+        """
+        # Extract intent and operation data
+        if isinstance(ai_response, dict):
+            intent_str = ai_response.get("intent", "unknown")
+            operation_str = ai_response.get("operation", "unknown")
+            confidence = ai_response.get("confidence", 0.0)
+        else:
+            intent_str = "unknown"
+            operation_str = "unknown"
+            confidence = 0.0
+        
+        # Map string to enum (case-insensitive)
+        intent = _INTENT_LOOKUP.get(str(intent_str).lower(), Intent.UNKNOWN)
+        if intent is Intent.UNKNOWN:
+            confidence = 0.0
+        
+        operation = _OPERATION_LOOKUP.get(str(operation_str).lower(), Operation.UNKNOWN)
         
+        return intent, operation, confidence
+    
+    def _match_intent_patterns(self, prompt: str) -> Tuple[Intent, Operation, float]:
+        """
+        Detect common GET intents with simple pattern matching
+        """
         # Check for common GET patterns
-        if any(word in prompt_lower for word in ["show", "list", "get", "display", "see", "view", "all my", "my clients", "my invoices", "my jobs", "my expenses", "my quotes"]):
-            if any(word in prompt_lower for word in ["client", "customer", "contact"]):
-                return Intent.CUSTOMER, Operation.GET, 0.8
-            elif any(word in prompt_lower for word in ["invoice", "bill", "billing"]):
-                return Intent.INVOICE, Operation.GET, 0.8
-            elif any(word in prompt_lower for word in ["job", "appointment", "meeting", "schedule"]):
-                return Intent.JOB, Operation.GET, 0.8
-            elif any(word in prompt_lower for word in ["expense", "cost", "spending"]):
-                return Intent.EXPENSE, Operation.GET, 0.8
-            elif any(word in prompt_lower for word in ["quote", "estimate", "proposal"]):
-                return Intent.QUOTE, Operation.GET, 0.8
+        match = _FALLBACK_RE.match(prompt)
+        if match:
+            return Intent(match.lastgroup), Operation.GET, 0.8
         
         return Intent.UNKNOWN, Operation.UNKNOWN, 0.0
     
@@ -448,7 +846,8 @@ class UnifiedAgentService:
         intent: Intent, 
         operation: Operation,
         language: str,
-        history: List[Dict] = None # NEW ARGUMENT
+        history: List[Dict] = None, # NEW ARGUMENT
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Extract relevant data fields based on the detected intent
@@ -465,196 +864,29 @@ class UnifiedAgentService:
                 "missing_fields": []
             }
         
-        extraction_prompts = {
-            Intent.INVOICE: """
-            Extract invoice data from this prompt. Return JSON with these fields:
-            - customer_name: Customer/client name
-            - customer_email: Email address
-            - customer_phone: Phone number (optional)
-            - customer_address: Address (optional)
-            - items: Array of {description, quantity, unit_price, total}
-            - subtotal: Subtotal amount
-            - tax_rate: Tax rate (default 0.20)
-            - tax_amount: Tax amount
-            - total_amount: Final total
-            - invoice_date: Date (ISO format, default today)
-            - due_date: Due date (ISO format, default +30 days)
-            """,
-            Intent.QUOTE: """
-            Extract comprehensive quote data from this prompt. Return JSON with these fields:
-            
-            CLIENT INFORMATION:
-            - customer_name: Customer/client full name
-            - customer_email: Email address
-            - customer_phone: Phone number (optional)
-            - customer_company_type: "COMPANY" or "INDIVIDUAL" (based on context)
-            
-            PROJECT DETAILS:
-            - title: Quote title/subject
-            - project_name: Project or job name (mandatory)
-            - project_street_address: Street address component (optional)
-            - project_zip_code: ZIP/postal code (optional)
-            - project_city: City name (optional)
-            
-            QUOTE DETAILS:
-            - services: Array of {description, estimated_hours, hourly_rate, total, type}
-            - subtotal: Subtotal amount before discounts
-            
-            DISCOUNT INFORMATION:
-            - discount: Discount amount or percentage value
-            - discount_type: "FIXED" (euro amount) or "PERCENTAGE"
-            
-            DOWN PAYMENT INFORMATION:
-            - down_payment: Down payment amount or percentage value
-            - down_payment_type: "FIXED" (euro amount) or "PERCENTAGE"
-            
-            TAX AND TOTALS:
-            - vat_rate: VAT rate (default 0.20 = 20%)
-            - estimated_total: Final estimated total after all calculations
-            
-            DATES:
-            - valid_until: Quote validity date (ISO format, default +30 days)
-            
-            NOTES (categorize appropriately):
-            - internal_notes: Internal notes (not visible to client)
-            - public_notes: Notes visible on PDF/to client
-            
-            SIGNATURES (if mentioned):
-            - contractor_signature: Contractor signature reference
-            - client_signature: Client signature reference
-            
-            Extract discount type:
-            - PERCENTAGE: if "%" symbol present or percentage mentioned
-            - FIXED: if euro/currency amount specified
-            
-            Determine company type from context:
-            - INDIVIDUAL: "person", "individual", "freelancer", "self-employed"
-            - COMPANY: "company", "business", "corp", "ltd", "organization"
-            """,
-            Intent.CUSTOMER: """
-            Extract customer data from this prompt. Return JSON with these fields:
-            - name: Full name
-            - email: Email address
-            - phone: Phone number
-            - address: Full address
-            - company: Company name (optional)
-            - notes: Additional notes (optional)
-            - language_preference: Language preference (en/fr)
-            """,
-            Intent.JOB: """
-            Extract job data from this prompt. Return JSON with these fields:
-            - title: Job title/description
-            - customer_name: Customer name
-            - customer_email: Customer email (optional)
-            - scheduled_date: Scheduled date (ISO format)
-            - scheduled_time: Scheduled time (HH:MM format)
-            - duration: Duration in hours
-            - location: Job location (optional)
-            - notes: Additional notes (optional)
-            """,
-            Intent.EXPENSE: """
-            Extract expense data from this prompt. Return JSON with these fields:
-            - description: Expense description
-            - amount: Amount spent
-            - date: Expense date (ISO format)
-            - category: Expense category
-            - vendor: Vendor/supplier name (optional)
-            - payment_method: Payment method (optional)
-            - receipt_number: Receipt number (optional)
-            - vat_rate: VAT rate (default 0.20)
-            - vat_amount: VAT amount
-            """,
-            Intent.MANUAL_TASK: """
-            Extract manual task data from this prompt. Return JSON with these fields:
-            - title: Task title/description
-            - start_time: Start date and time (ISO format)
-            - end_time: End date and time (ISO format)
-            - color: Color (hex code, optional, default #ff0000)
-            - client_id: Associated client ID (optional)
-            - assigned_to: Assigned worker/team (optional)
-            - location: Task location/address (optional)
-            - notes: Task notes/details (optional)
-            - is_all_day: Whether this is an all-day task (boolean, optional)
-            """
-        }
-        
-        extract_prompt = extraction_prompts.get(intent, "")
+        # The prompt table doubles as the dispatch table: intents without an
+        # extraction prompt (e.g. UNKNOWN) have no agent to extract with
+        extract_prompt = _EXTRACTION_PROMPTS.get(intent)
         if not extract_prompt:
             return {}
         
         full_prompt = f"{extract_prompt}\n\nUser prompt: \"{prompt}\"\n\nReturn only valid JSON:"
         
         try:
-            # Use appropriate tool based on intent
-            if intent == Intent.INVOICE:
-                result = await self.sk_service.process_invoice_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            elif intent == Intent.QUOTE:
-                result = await self.sk_service.process_quote_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            elif intent == Intent.CUSTOMER:
-                result = await self.sk_service.process_customer_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            elif intent == Intent.JOB:
-                result = await self.sk_service.process_job_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            elif intent == Intent.EXPENSE:
-                result = await self.sk_service.process_expense_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            elif intent == Intent.MANUAL_TASK:
-                result = await self.sk_service.process_manual_task_request(
-                    prompt=full_prompt,
-                    context={"task": "data_extraction"},
-                    language=language,
-                    history=history # Pass it here
-                )
-            else:
-                return {}
+            # The agent for the intent is selected by its type name
+            result = await self.sk_service.process(
+                intent.value,
+                prompt=full_prompt,
+                context={"task": "data_extraction"},
+                language=language,
+                history=history,
+                session_id=session_id
+            )
             
             if result.get("success") and result.get("data"):
-                ai_response = result["data"]
-                
-                # Handle case where AI response is wrapped in "response" key
-                if isinstance(ai_response, dict) and "response" in ai_response:
-                    ai_response = ai_response["response"]
-                
-                # Try to parse as JSON if it's a string
-                if isinstance(ai_response, str):
-                    # Strip markdown code blocks if present
-                    ai_response = ai_response.strip()
-                    if ai_response.startswith("```json"):
-                        ai_response = ai_response[7:]  # Remove ```json
-                    if ai_response.startswith("```"):
-                        ai_response = ai_response[3:]   # Remove ```
-                    if ai_response.endswith("```"):
-                        ai_response = ai_response[:-3]  # Remove ```
-                    ai_response = ai_response.strip()
-                    
-                    try:
-                        ai_response = json.loads(ai_response)
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Failed to parse extraction response as JSON: {ai_response}")
-                        return {}
+                ai_response = self._unwrap_ai_response(result["data"])
+                if ai_response is None:
+                    return {}
                 
                 # Return the parsed data
                 if isinstance(ai_response, dict):
@@ -716,7 +948,7 @@ class UnifiedAgentService:
             # For general "get all" queries, no data is missing
             return []
         
-        required = self.required_fields.get(intent, [])
+        required = self.REQUIRED_FIELDS.get(intent, ())
         missing = []
         
         for field in required:
@@ -771,7 +1003,7 @@ class UnifiedAgentService:
                     
                     # Parse the JSON result from tools
                     if isinstance(result, str):
-                        result = json.loads(result)
+                        result = orjson.loads(result)
                     
                     # Extract the actual data
                     if "client" in result:
@@ -810,7 +1042,7 @@ class UnifiedAgentService:
                     
                     # Parse the JSON result from tools
                     if isinstance(result, str):
-                        result = json.loads(result)
+                        result = orjson.loads(result)
                     
                     # Extract the list data
                     if "clients" in result:
@@ -980,26 +1212,22 @@ class UnifiedAgentService:
         
         return base_response
     
-    def _get_conversation_state(self, user_id: str) -> Dict[str, Any]:
+    def _get_conversation_state(self, user_id: str) -> Conversation:
         """
         Get or create conversation state for user
         """
-        if user_id not in self.conversations:
-            self.conversations[user_id] = {
-                "state": ConversationState.INTENT_DETECTION,
-                "intent": None,
-                "confidence": 0.0,
-                "data": {},
-                "missing_data_attempts": 0,
-                "history": [],  # Initialize history list
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
-        return self.conversations[user_id]
+        conversation = self.conversations.get(user_id)
+        if conversation is None:
+            conversation = Conversation()
+        else:
+            conversation.updated_at = datetime.now().isoformat()
+        # Re-inserting restarts the TTL, so only idle conversations expire
+        self.conversations[user_id] = conversation
+        return conversation
     
     def _create_clarification_response(
         self, 
-        conversation: Dict[str, Any], 
+        conversation: Conversation, 
         language: str
     ) -> Dict[str, Any]:
         """
@@ -1025,7 +1253,7 @@ class UnifiedAgentService:
     
     def _create_missing_data_response(
         self, 
-        conversation: Dict[str, Any], 
+        conversation: Conversation, 
         missing_fields: List[str], 
         language: str
     ) -> Dict[str, Any]:
@@ -1086,7 +1314,7 @@ class UnifiedAgentService:
             "message": messages.get(language, messages["en"]),
             "action": "provide_missing_data",
             "missing_fields": missing_fields,
-            "current_data": conversation["data"]
+            "current_data": conversation.data
         }
     
     def _create_error_response(self, error_message: str, language: str) -> Dict[str, Any]:
@@ -1109,26 +1337,25 @@ class UnifiedAgentService:
         """
         Reset conversation state for a user
         """
-        if user_id in self.conversations:
-            del self.conversations[user_id]
+        self.conversations.pop(user_id, None)
     
     def get_conversation_status(self, user_id: str) -> Dict[str, Any]:
         """
         Get current conversation status for a user
         """
-        if user_id not in self.conversations:
+        conversation = self.conversations.get(user_id)
+        if conversation is None:
             return {"status": "no_active_conversation"}
         
-        conversation = self.conversations[user_id]
         return {
             "status": "active",
-            "state": conversation["state"],
-            "intent": conversation["intent"],
-            "operation": conversation.get("operation"),
-            "confidence": conversation["confidence"],
-            "has_data": bool(conversation["data"]),
-            "created_at": conversation["created_at"],
-            "updated_at": conversation["updated_at"]
+            "state": conversation.state,
+            "intent": conversation.intent,
+            "operation": conversation.operation,
+            "confidence": conversation.confidence,
+            "has_data": bool(conversation.data),
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at
         }
     
     def generate_human_friendly_response(self, structured_response: Dict[str, Any]) -> str:
@@ -5,10 +5,10 @@ Integrated directly into Devia backend
 """
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from .audio_transcription_service import AudioTranscriptionService
 from .text_to_speech_service import TextToSpeechService
-from config.settings import Settings
+from config.settings import get_settings
 
 class UnifiedAudioService:
     """
@@ -27,7 +27,7 @@ class UnifiedAudioService:
         
         # Load API key from settings if not provided
         if api_key is None:
-            settings = Settings()
+            settings = get_settings()
             api_key = settings.openai_api_key
             
             if not settings.validate_openai_key():
@@ -236,11 +236,11 @@ class UnifiedAudioService:
         """Get supported audio formats for transcription"""
         return self.transcription_service.get_supported_formats()
     
-    def get_available_voices(self) -> list:
+    def get_available_voices(self) -> Tuple[str, ...]:
         """Get available TTS voices"""
         return self.tts_service.get_available_voices()
     
-    def get_available_tts_models(self) -> list:
+    def get_available_tts_models(self) -> Tuple[str, ...]:
         """Get available TTS models"""
         return self.tts_service.get_available_models()
     